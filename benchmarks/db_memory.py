@@ -0,0 +1,97 @@
+"""Compares the memory used by the tracking DB for a synthetic library.
+
+The previous representation, nested dicts of Path objects with a reverse index,
+is rebuilt here as the baseline.
+
+    python benchmarks/db_memory.py [configs]
+"""
+
+import gc
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import umu_commander.configuration as config
+import umu_commander.database as db
+
+PROTON_DIRS: int = 3
+VERSIONS_PER_DIR: int = 20
+
+
+def write_snapshot(path: Path, configs: int):
+    snapshot: dict[str, dict[str, list[str]]] = defaultdict(lambda: defaultdict(list))
+    for i in range(configs):
+        proton_dir = f"/home/user/.local/share/proton_dir_{i % PROTON_DIRS}"
+        proton_ver = f"GE-Proton{i // PROTON_DIRS % VERSIONS_PER_DIR}"
+        snapshot[proton_dir][proton_ver].append(
+            f"/run/media/user/Games/library_{i % 7}/game_{i}/umu-config.toml"
+        )
+
+    with open(path, "wt") as db_file:
+        json.dump(snapshot, db_file)
+
+
+def load_paths(path: Path) -> tuple[Any, Any]:
+    paths: defaultdict[Path, defaultdict[Path, dict[Path, None]]] = defaultdict(
+        lambda: defaultdict(dict)
+    )
+    users: dict[Path, tuple[Path, Path]] = {}
+    with open(path, "rt") as db_file:
+        for proton_dir, proton_vers in json.load(db_file).items():
+            proton_dir = Path(proton_dir)
+            for proton_ver, proton_users in proton_vers.items():
+                proton_ver = proton_dir / proton_ver
+                for user in proton_users:
+                    user = Path(user)
+                    # Hashing fills the cached string and parts like real use does.
+                    paths[proton_dir][proton_ver][user] = None
+                    users[user] = (proton_dir, proton_ver)
+
+    return paths, users
+
+
+def load_interned(path: Path):
+    db._reset()
+    config.DB_DIR = path.parent
+    config.DB_NAME = Path(path.name)
+    db.load()
+
+
+def measure(load: Callable[[], Any]) -> tuple[int, float]:
+    """Returns the bytes still allocated after load and the seconds it took."""
+    gc.collect()
+    tracemalloc.start()
+    start: float = time.perf_counter()
+    result = load()
+    elapsed: float = time.perf_counter() - start
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size, elapsed
+
+
+def main(configs: int = 100_000):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        snapshot = Path(temp_dir) / "tracking.json"
+        write_snapshot(snapshot, configs)
+
+        before, before_time = measure(lambda: load_paths(snapshot))
+        db._reset()
+        after, after_time = measure(lambda: load_interned(snapshot))
+
+    print(f"{configs} tracked configs")
+    print(f"Path dicts: {before / configs:8.1f} B/config, loaded in {before_time:.3f}s")
+    print(f"Interned:   {after / configs:8.1f} B/config, loaded in {after_time:.3f}s")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,369 @@
+"""Times umu-commander operations against a synthetic library.
+
+    python benchmarks/suite.py [--configs N] [--versions N] [--prefixes N]
+        [--repeat N] [--only NAME] [--output FILE] [--compare FILE]
+
+Results are written as JSON, to stdout unless --output is given:
+
+    {"python": ..., "umu_commander": ..., "parameters": {...},
+     "results": {"<benchmark>": {"min": s, "median": s, "runs": [s, ...]}}}
+
+--compare prints each benchmark's median relative to an earlier results file.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Any
+
+SRC_DIR: Path = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+import umu_commander.configuration as config
+import umu_commander.database as db
+from umu_commander import VERSION, proton, tracking, umu_config, usage
+from umu_commander.util import build_choices
+
+# Configs tracked or untracked by the track and untrack benchmarks.
+OPERATIONS: int = 1_000
+# Unused versions removed by the delete benchmark.
+DELETED_VERSIONS: int = 20
+# Files in every prefix's system32.
+PREFIX_FILES: int = 200
+# Old enough for every mtime keyed cache to trust it.
+OLD_MTIME: int = 1_000_000_000
+
+UMU_CONFIG: str = """[umu]
+prefix = "{prefix}"
+proton = "{proton}"
+exe = "{exe}"
+
+[env]
+DXVK_ASYNC = 1
+"""
+
+
+class Environment:
+    """A synthetic home with Proton versions, tracked configs and prefixes."""
+
+    def __init__(self, root: Path, configs: int, versions: int, prefixes: int):
+        self.root: Path = root
+        self.proton_paths: tuple[Path, ...] = tuple(
+            root / f"compatibilitytools_{i}" for i in range(3)
+        )
+        self.versions: list[Path] = []
+        self.configs: list[Path] = []
+        self.prefix_dir: Path = root / "wineprefixes"
+        self.bin_dir: Path = root / "bin"
+
+        config.PROTON_PATHS = self.proton_paths
+        config.UMU_PROTON_PATH = self.proton_paths[0]
+        config.DB_DIR = root / "db"
+        config.DB_NAME = Path("tracking.json")
+        config.CACHE_DIR = root / "cache"
+        config.DEFAULT_PREFIX_DIR = self.prefix_dir
+        config.DB_DIR.mkdir()
+
+        for i in range(versions):
+            proton_dir: Path = self.proton_paths[i % 3]
+            name: str = f"UMU-Proton-9.0-{i}" if i % 3 == 0 else f"GE-Proton{i}"
+            self.versions.append(self.make_version(proton_dir / name))
+
+        # Half the versions track configs, the rest are candidates for delete.
+        used: list[Path] = self.versions[: max(1, versions // 2)]
+        for i in range(configs):
+            game_dir: Path = root / "library" / f"shelf_{i // 1000}" / f"game_{i}"
+            game_dir.mkdir(parents=True)
+            (game_dir / "game.exe").touch()
+            umu_config_path: Path = game_dir / config.DEFAULT_UMU_CONFIG_NAME
+            proton_ver: Path = used[i % len(used)]
+            umu_config_path.write_text(
+                UMU_CONFIG.format(
+                    prefix=game_dir, proton=proton_ver, exe=game_dir / "game.exe"
+                )
+            )
+            os.utime(umu_config_path, (OLD_MTIME, OLD_MTIME))
+            self.configs.append(umu_config_path)
+            db.add_user(proton_ver.parent, proton_ver, umu_config_path)
+        db.compact()
+
+        for i in range(prefixes):
+            system32: Path = (
+                self.prefix_dir / f"prefix_{i}" / "drive_c/windows/system32"
+            )
+            system32.mkdir(parents=True)
+            for j in range(PREFIX_FILES):
+                (system32 / f"lib_{j}.dll").write_bytes(b"\0" * (j * 64))
+
+        self.bin_dir.mkdir()
+        umu_run: Path = self.bin_dir / "umu-run"
+        umu_run.write_text("#!/bin/sh\nexit 0\n")
+        umu_run.chmod(0o755)
+
+        for path in (*self.proton_paths, *self.prefix_dir.rglob("*")):
+            if path.is_dir():
+                os.utime(path, (OLD_MTIME, OLD_MTIME))
+
+    @staticmethod
+    def make_version(proton_ver: Path) -> Path:
+        proton_ver.mkdir(parents=True)
+        (proton_ver / "proton").write_text("#!/bin/sh\n")
+        os.utime(proton_ver.parent, (OLD_MTIME, OLD_MTIME))
+        return proton_ver
+
+    def reload_db(self):
+        db._journal_path().unlink(missing_ok=True)
+        db._reset()
+        db.load()
+
+    def reset_caches(self):
+        proton._reset()
+        usage._reset()
+        shutil.rmtree(config.CACHE_DIR, ignore_errors=True)
+
+
+# Each benchmark prepares the environment and returns the function to time.
+Benchmark = Callable[[Environment], Callable[[], Any]]
+BENCHMARKS: dict[str, Benchmark] = {}
+
+
+def benchmark(name: str) -> Callable[[Benchmark], Benchmark]:
+    def decorator(function: Benchmark) -> Benchmark:
+        BENCHMARKS[name] = function
+        return function
+
+    return decorator
+
+
+@benchmark("database.load")
+def _database_load(env: Environment) -> Callable[[], Any]:
+    db._journal_path().unlink(missing_ok=True)
+    db._reset()
+    return db.load
+
+
+@benchmark("database.dump")
+def _database_dump(env: Environment) -> Callable[[], Any]:
+    env.reload_db()
+    for umu_config_path in env.configs[:OPERATIONS]:
+        db.remove_user(env.versions[0].parent, env.versions[0], umu_config_path)
+    return db.dump
+
+
+@benchmark("database.compact")
+def _database_compact(env: Environment) -> Callable[[], Any]:
+    env.reload_db()
+    return db.compact
+
+
+@benchmark("tracking.track")
+def _tracking_track(env: Environment) -> Callable[[], Any]:
+    env.reload_db()
+
+    def track():
+        for umu_config_path in env.configs[:OPERATIONS]:
+            tracking.track(
+                env.versions[-1],
+                umu_config_path,
+                interactive=False,
+                update_versions=False,
+                quiet=True,
+            )
+
+    return track
+
+
+@benchmark("tracking.untrack")
+def _tracking_untrack(env: Environment) -> Callable[[], Any]:
+    env.reload_db()
+
+    def untrack():
+        for umu_config_path in env.configs[:OPERATIONS]:
+            tracking.untrack(umu_config_path, quiet=True)
+
+    return untrack
+
+
+@benchmark("tracking.untrack_unlinked")
+def _tracking_untrack_unlinked(env: Environment) -> Callable[[], Any]:
+    env.reload_db()
+    return tracking.untrack_unlinked
+
+
+@benchmark("tracking.delete")
+def _tracking_delete(env: Environment) -> Callable[[], Any]:
+    env.reload_db()
+    env.reset_caches()
+    for i in range(DELETED_VERSIONS):
+        proton_ver: Path = env.make_version(env.proton_paths[1] / f"Unused-{i}")
+        db.add_user(proton_ver.parent, proton_ver, env.root / "removed")
+    tracking.untrack(env.root / "removed", quiet=True)
+
+    def delete():
+        deletable: dict[Path, list[Path]] = tracking.collect_deletable()
+        tracking.remove_versions(
+            [
+                proton_ver
+                for proton_vers in deletable.values()
+                for proton_ver in proton_vers
+            ],
+            quiet=True,
+        )
+
+    return delete
+
+
+@benchmark("proton.collect_proton_versions.cold")
+def _collect_proton_versions_cold(env: Environment) -> Callable[[], Any]:
+    env.reset_caches()
+    return lambda: proton.collect_proton_versions(sort=True)
+
+
+@benchmark("proton.collect_proton_versions.warm")
+def _collect_proton_versions_warm(env: Environment) -> Callable[[], Any]:
+    env.reset_caches()
+    proton.collect_proton_versions(sort=True)
+    proton._reset()
+    return lambda: proton.collect_proton_versions(sort=True)
+
+
+@benchmark("util.build_choices")
+def _build_choices(env: Environment) -> Callable[[], Any]:
+    env.reload_db()
+    proton_dirs = proton.collect_proton_versions(sort=True)
+    return lambda: build_choices(None, proton_dirs, count_elements=True)
+
+
+@benchmark("usage.tree_usage.cold")
+def _tree_usage_cold(env: Environment) -> Callable[[], Any]:
+    env.reset_caches()
+    prefixes: list[Path] = sorted(env.prefix_dir.iterdir())
+    return lambda: usage.tree_usage(prefixes)
+
+
+@benchmark("usage.tree_usage.warm")
+def _tree_usage_warm(env: Environment) -> Callable[[], Any]:
+    env.reset_caches()
+    prefixes: list[Path] = sorted(env.prefix_dir.iterdir())
+    usage.tree_usage(prefixes)
+    usage._reset()
+    return lambda: usage.tree_usage(prefixes)
+
+
+@benchmark("umu_config.run")
+def _umu_config_run(env: Environment) -> Callable[[], Any]:
+    os.environ["PATH"] = f"{env.bin_dir}{os.pathsep}{os.environ['PATH']}"
+    umu_config.load_plan(env.configs[0])
+    return lambda: umu_config.run(env.configs[0])
+
+
+@benchmark("cli.run")
+def _cli_run(env: Environment) -> Callable[[], Any]:
+    process_env: dict[str, str] = {
+        **os.environ,
+        "HOME": str(env.root),
+        "PATH": f"{env.bin_dir}{os.pathsep}{os.environ['PATH']}",
+        "PYTHONPATH": str(SRC_DIR),
+    }
+    args: list[str] = [
+        sys.executable,
+        "-m",
+        "umu_commander",
+        "run",
+        "-i",
+        str(env.configs[0]),
+    ]
+    # Warms the launch plan cache under the synthetic home.
+    subprocess.run(args, env=process_env, check=True, capture_output=True)
+    return lambda: subprocess.run(
+        args, env=process_env, check=True, capture_output=True
+    )
+
+
+def run_benchmarks(env: Environment, names: list[str], repeat: int) -> dict[str, Any]:
+    results: dict[str, Any] = {}
+    for name in names:
+        runs: list[float] = []
+        for _ in range(repeat):
+            with redirect_stdout(io.StringIO()):
+                function: Callable[[], Any] = BENCHMARKS[name](env)
+                start: float = time.perf_counter()
+                function()
+                runs.append(time.perf_counter() - start)
+
+        results[name] = {
+            "min": min(runs),
+            "median": statistics.median(runs),
+            "runs": runs,
+        }
+        print(f"{name:40} {results[name]['median'] * 1000:10.2f} ms", file=sys.stderr)
+
+    return results
+
+
+def compare(results: dict[str, Any], baseline_path: Path):
+    with open(baseline_path, "rt") as baseline_file:
+        baseline: dict[str, Any] = json.load(baseline_file)["results"]
+
+    print(f"Compared to {baseline_path}:", file=sys.stderr)
+    for name, result in results.items():
+        if name in baseline and baseline[name]["median"] > 0:
+            ratio: float = result["median"] / baseline[name]["median"]
+            print(f"{name:40} {ratio:10.2f}x", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--configs", type=int, default=10_000)
+    parser.add_argument("--versions", type=int, default=200)
+    parser.add_argument("--prefixes", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", action="append", choices=BENCHMARKS)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--compare", type=Path)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        start: float = time.perf_counter()
+        env = Environment(Path(temp_dir), args.configs, args.versions, args.prefixes)
+        print(
+            f"Generated environment in {time.perf_counter() - start:.2f}s",
+            file=sys.stderr,
+        )
+        results = run_benchmarks(env, args.only or [*BENCHMARKS], args.repeat)
+
+    report: dict[str, Any] = {
+        "python": platform.python_version(),
+        "umu_commander": VERSION,
+        "parameters": {
+            "configs": args.configs,
+            "versions": args.versions,
+            "prefixes": args.prefixes,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    if args.output is not None:
+        with open(args.output, "wt") as output_file:
+            json.dump(report, output_file, indent="\t")
+    else:
+        json.dump(report, sys.stdout, indent="\t")
+        print()
+
+    if args.compare is not None:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
 from enum import IntEnum
+from pathlib import Path
+from typing import NamedTuple
 
 
 class Element(str):
@@ -12,7 +14,13 @@ class Element(str):
         return instance
 
 
+class ProtonUpdate(NamedTuple):
+    name: str
+    path: Path
+
+
 class ExitCode(IntEnum):
     SUCCESS = 0
     DECODING_ERROR = 1
     INVALID_SELECTION = 2
+    OPERATION_FAILED = 3
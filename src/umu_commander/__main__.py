@@ -1,21 +1,22 @@
 import argparse
+import os
+import sys
 from argparse import ArgumentParser, Namespace
 from json import JSONDecodeError
 from pathlib import Path
 
-from InquirerPy.exceptions import InvalidArgument
-
 from umu_commander import VERSION
 from umu_commander import configuration as config
 from umu_commander import database as db
-from umu_commander import tracking, umu_config
+from umu_commander import prewarm, profiling, umu_config
 from umu_commander.configuration import CONFIG_DIR, CONFIG_NAME, DEFAULT_UMU_CONFIG_NAME
 from umu_commander.Types import ExitCode
 
 
-def init() -> ExitCode:
+def load_config() -> ExitCode:
     try:
-        config.load()
+        with profiling.span("config.load"):
+            config.load()
 
     except (JSONDecodeError, KeyError):
         config_path: Path = CONFIG_DIR / CONFIG_NAME
@@ -32,18 +33,38 @@ def init() -> ExitCode:
     except FileNotFoundError:
         config.dump()
 
+    return ExitCode.SUCCESS
+
+
+def init() -> ExitCode:
+    if (return_code := load_config()) != ExitCode.SUCCESS:
+        return return_code
+
+    load_errors: tuple[type[Exception], ...] = (JSONDecodeError,)
+    if db._use_sqlite():
+        # Imported here so run and JSON DBs do not pay for it.
+        import sqlite3
+
+        load_errors += (sqlite3.DatabaseError,)
+
     try:
         db.load()
 
-    except JSONDecodeError:
+    except load_errors:
         db_path: Path = config.DB_DIR / config.DB_NAME
         db_path_old: Path = config.DB_DIR / (str(config.DB_NAME) + ".old")
 
         print(f"Tracking file at {db_path} could not be read.")
+        db.close()
 
         if not db_path_old.exists():
             db_path.rename(db_path_old)
             print(f"DB file renamed to {db_path_old}.")
+            try:
+                # The JSON DB it was migrated from is likely out of date.
+                db.load(migrate=False)
+            except FileNotFoundError:
+                pass
 
     except FileNotFoundError:
         pass
@@ -51,7 +72,15 @@ def init() -> ExitCode:
     return ExitCode.SUCCESS
 
 
-def get_parser_results() -> tuple[ArgumentParser, Namespace]:
+def positive_int(value: str) -> int:
+    number: int = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"{value} is not at least 1")
+
+    return number
+
+
+def get_parser_results(argv: list[str] = None) -> tuple[ArgumentParser, Namespace]:
     parser = argparse.ArgumentParser(
         prog=f"umu-commander",
         description="Interactive CLI tool to augment umu-launcher",
@@ -74,7 +103,26 @@ def get_parser_results() -> tuple[ArgumentParser, Namespace]:
     parser.add_argument(
         "verb",
         help="Selects program functionality.",
-        choices=["track", "untrack", "users", "delete", "create", "run", "fix"],
+        choices=[
+            "track",
+            "untrack",
+            "users",
+            "delete",
+            "create",
+            "run",
+            "fix",
+            "usage",
+            "batch",
+            "scan",
+            "daemon",
+            "dedupe",
+        ],
+    )
+    parser.add_argument(
+        "targets",
+        help="Directories to scan for umu configs, or umu configs, their directories and globs of them to run concurrently. Default: -i/--input or $PWD",
+        nargs="*",
+        type=Path,
     )
     parser.add_argument(
         "-i",
@@ -121,6 +169,12 @@ def get_parser_results() -> tuple[ArgumentParser, Namespace]:
         help=f"Sets output config filename in config creation. Default directory/{DEFAULT_UMU_CONFIG_NAME}",
         type=Path,
     )
+    parser.add_argument(
+        "-t",
+        "--template",
+        help="Clones the prefix from a template set up once per Proton version in config creation. Default: Prefix is set up on first run",
+        action="store_true",
+    )
     parser.add_argument(
         "-ni",
         "--no-interactive",
@@ -135,8 +189,54 @@ def get_parser_results() -> tuple[ArgumentParser, Namespace]:
         action="store_true",
         dest="update",
     )
+    parser.add_argument(
+        "--profile",
+        help=f"Writes a JSON report of where time was spent to the given file. Default: ${profiling.PROFILE_ENV}",
+        type=Path,
+        default=os.environ.get(profiling.PROFILE_ENV),
+    )
+    parser.add_argument(
+        "--profile-capture",
+        help=f"Adds cProfile or tracemalloc data to the profile report, can be given more than once. Default: ${profiling.PROFILE_CAPTURE_ENV}, comma separated",
+        choices=profiling.CAPTURES,
+        action="append",
+    )
+    parser.add_argument(
+        "--prewarm",
+        help=f"Reads the Proton version ahead into the page cache while running, all also reads the prefix's system DLLs. Default: ${prewarm.PREWARM_ENV}, otherwise off",
+        choices=prewarm.LEVELS,
+        nargs="?",
+        const="proton",
+        default=(
+            os.environ.get(prewarm.PREWARM_ENV)
+            if os.environ.get(prewarm.PREWARM_ENV) in prewarm.LEVELS
+            else None
+        ),
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help="Sets how many configs run launches at once. Default: All of them",
+        type=positive_int,
+    )
+    parser.add_argument(
+        "--dry-run",
+        help="Only reports how much space dedupe would reclaim.",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--any-toml",
+        help="Also scans TOML files with other names that contain a [umu] table.",
+        action="store_true",
+    )
 
-    args = parser.parse_args()
+    # Intermixed, so options may follow targets.
+    args = parser.parse_intermixed_args(argv)
+
+    if len(args.targets) > 0 and args.verb not in ("scan", "run"):
+        parser.error(f"{args.verb} does not take targets")
+    if args.jobs is not None and args.verb != "run":
+        parser.error("-j/--jobs only applies to run")
 
     args.launch_args = (
         args.launch_args.split(" ") if args.launch_args is not None else None
@@ -147,29 +247,111 @@ def get_parser_results() -> tuple[ArgumentParser, Namespace]:
 
 
 def main() -> int:
+    parser, args = get_parser_results()
+
+    if args.profile is None:
+        return dispatch(parser, args)
+
+    captures: list[str] = args.profile_capture or [
+        capture
+        for capture in os.environ.get(profiling.PROFILE_CAPTURE_ENV, "").split(",")
+        if capture in profiling.CAPTURES
+    ]
+    profiling.start(captures)
+    try:
+        with profiling.span(f"verb.{args.verb}"):
+            return dispatch(parser, args)
+
+    finally:
+        profiling.report(Path(args.profile))
+
+
+def dispatch(parser: ArgumentParser, args: Namespace) -> int:
+    # Launching only needs the config, tracking upkeep is left to other verbs.
+    if args.verb == "run":
+        if (return_code := load_config()) != ExitCode.SUCCESS:
+            return return_code.value
+
+        if len(args.targets) == 0:
+            umu_config.run(args.input, args.prewarm)
+            return ExitCode.SUCCESS.value
+
+        # Imported here so single launches do not pay for asyncio.
+        from umu_commander import supervise
+
+        if (
+            supervise.run_many(
+                args.targets,
+                jobs=args.jobs,
+                prewarm_level=args.prewarm,
+                quiet=args.quiet,
+            )
+            > 0
+        ):
+            return ExitCode.OPERATION_FAILED.value
+
+        return ExitCode.SUCCESS.value
+
+    # Imported here so launching does not pay for the socket modules.
+    from umu_commander import daemon, tracking
+
+    # Verbs that never prompt are answered by the daemon when one is running.
+    if args.profile is None and daemon.forwardable(args):
+        if (response := daemon.request(sys.argv[1:])) is not None:
+            print(response["stdout"], end="")
+            print(response["stderr"], end="", file=sys.stderr)
+            return response["code"]
+
     if (return_code := init()) != ExitCode.SUCCESS:
         return return_code.value
 
-    parser, args = get_parser_results()
+    try:
+        if args.verb == "daemon":
+            daemon.serve(lambda argv: execute(*get_parser_results(argv)), reload)
+            return ExitCode.SUCCESS.value
+
+        return execute(parser, args)
+
+    finally:
+        tracking.maintenance()
+        db.dump()
+
+
+def reload():
+    db._reset()
+    init()
 
+
+def execute(parser: ArgumentParser, args: Namespace) -> int:
+    # Verb modules are imported by the verbs using them, so each invocation only
+    # pays for its own.
     try:
         match args.verb:
             case "track":
+                from umu_commander import tracking
+
                 tracking.track(
                     args.proton,
                     args.input,
+                    interactive=args.interactive,
                     update_versions=args.update,
                     quiet=args.quiet,
                 )
 
             case "untrack":
+                from umu_commander import tracking
+
                 tracking.untrack(args.input, quiet=args.quiet)
 
             case "users":
+                from umu_commander import tracking
+
                 tracking.users(args.proton)
 
             case "delete":
-                tracking.delete()
+                from umu_commander import tracking
+
+                tracking.delete(quiet=args.quiet)
 
             case "create":
                 umu_config.create(
@@ -181,33 +363,58 @@ def main() -> int:
                     args.runners,
                     args.input,
                     args.output,
+                    template=args.template,
                     interactive=args.interactive,
                     update_versions=args.update,
                     quiet=args.quiet,
                 )
 
-            case "run":
-                umu_config.run(args.input)
-
             case "fix":
                 umu_config.fix(args.input)
 
+            case "usage":
+                from umu_commander import usage
+
+                usage.usage()
+
+            case "batch":
+                from umu_commander import batch
+
+                if batch.batch(args.input) > 0:
+                    return ExitCode.OPERATION_FAILED.value
+
+            case "scan":
+                from umu_commander import scan
+
+                roots: list[Path] = args.targets
+                if len(roots) == 0 and args.input is not None:
+                    roots = [args.input]
+
+                scan.scan(roots, any_toml=args.any_toml, quiet=args.quiet)
+
+            case "dedupe":
+                from umu_commander import dedupe
+
+                dedupe.dedupe(dry_run=args.dry_run, quiet=args.quiet)
+
             case _:
                 print("Unrecognised verb.")
                 parser.print_help()
                 return ExitCode.INVALID_SELECTION.value
 
-    except InvalidArgument:
+    except Exception as e:
+        # Only verbs that prompt import InquirerPy, so only check for it here.
+        from InquirerPy.exceptions import InvalidArgument
+
+        if not isinstance(e, InvalidArgument):
+            raise
+
         print("No choices to select from.")
         return ExitCode.INVALID_SELECTION.value
 
     else:
         return ExitCode.SUCCESS.value
 
-    finally:
-        tracking.untrack_unlinked()
-        db.dump()
-
 
 if __name__ == "__main__":
     exit(main())
@@ -0,0 +1,132 @@
+import json
+import sys
+import tomllib
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any, TextIO
+
+from umu_commander import tracking, umu_config
+from umu_commander.configuration import DEFAULT_UMU_CONFIG_NAME
+from umu_commander.proton import get_latest_umu_proton
+
+
+def _read_lines(manifest_file: TextIO) -> Iterator[Any]:
+    for line in manifest_file:
+        if line.strip() == "":
+            continue
+
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            yield e
+
+
+def _read_operations(manifest: Path | None) -> Iterator[Any]:
+    """Yields manifest operations, or the error an operation could not be parsed with.
+
+    JSON Lines manifests, including stdin, are read one line at a time. TOML
+    manifests list operations as [[operations]] tables.
+    """
+    if manifest is None or str(manifest) == "-":
+        yield from _read_lines(sys.stdin)
+
+    elif manifest.suffix == ".toml":
+        with open(manifest, "rb") as manifest_file:
+            yield from tomllib.load(manifest_file).get("operations", [])
+
+    else:
+        with open(manifest, "rt") as manifest_file:
+            yield from _read_lines(manifest_file)
+
+
+def _proton(operation: dict[str, Any]) -> Path:
+    if "proton" in operation:
+        return Path(operation["proton"])
+
+    if (proton_ver := get_latest_umu_proton()) is None:
+        raise ValueError("No Proton version given and no UMU-Proton installed.")
+
+    return proton_ver
+
+
+def _apply(operation: dict[str, Any]) -> dict[str, Any]:
+    match operation.get("op"):
+        case "track":
+            config: Path = Path(operation["config"]).absolute()
+            proton_ver: Path = _proton(operation).absolute()
+            tracking.track(
+                proton_ver,
+                config,
+                interactive=False,
+                update_versions=False,
+                quiet=True,
+            )
+            return {"config": str(config), "proton": str(proton_ver)}
+
+        case "untrack":
+            config: Path = Path(operation["config"]).absolute()
+            tracking.untrack(config, quiet=True)
+            return {"config": str(config)}
+
+        case "create":
+            # Paths default to the operation's directory rather than $PWD.
+            directory: Path = Path(operation.get("directory", Path.cwd())).absolute()
+            output: Path = directory / operation.get("output", DEFAULT_UMU_CONFIG_NAME)
+            proton_ver: Path = _proton(operation).absolute()
+            created: Path | None = umu_config.create(
+                directory / operation.get("prefix", "prefix"),
+                proton_ver,
+                operation.get("dll_overrides"),
+                operation.get("lang"),
+                operation.get("launch_args"),
+                operation.get("runners"),
+                directory / operation["exe"],
+                output,
+                template=operation.get("template", False),
+                interactive=False,
+                update_versions=False,
+                quiet=True,
+            )
+            if created is None:
+                raise ValueError("Could not create configuration file.")
+
+            return {"config": str(created), "proton": str(proton_ver)}
+
+        case op:
+            raise ValueError(f"Unknown operation {op!r}.")
+
+
+def batch(manifest: Path = None) -> int:
+    """Applies every operation in the manifest and prints a JSON result line per
+    operation. Returns the number of failed operations.
+    """
+    failures: int = 0
+    try:
+        for index, operation in enumerate(_read_operations(manifest)):
+            result: dict[str, Any] = {"index": index}
+            try:
+                if isinstance(operation, ValueError):
+                    raise operation
+
+                if not isinstance(operation, dict):
+                    raise ValueError("Operations must be objects.")
+
+                result["op"] = operation.get("op")
+                result.update(_apply(operation))
+                result["ok"] = True
+
+            except (KeyError, TypeError, ValueError, OSError) as e:
+                failures += 1
+                result["ok"] = False
+                result["error"] = (
+                    f"Missing key {e}." if isinstance(e, KeyError) else str(e)
+                )
+
+            print(json.dumps(result), flush=True)
+
+    # Results go to stdout, so manifest errors go to stderr.
+    except (OSError, tomllib.TOMLDecodeError) as e:
+        print(f"Could not read manifest: {e}", file=sys.stderr)
+        failures += 1
+
+    return failures
@@ -4,8 +4,7 @@ import tomllib
 from pathlib import Path
 from typing import Any
 
-import tomli_w
-
+from umu_commander.files import atomic_open
 from umu_commander.Types import Element
 
 CONFIG_DIR: Path = Path.home() / ".config"
@@ -23,6 +22,9 @@ DB_NAME: Path = Path("tracking.json")
 DB_DIR: Path = Path.home() / ".local/share/umu/compatibilitytools"
 DEFAULT_UMU_CONFIG_NAME: Path = Path("umu-config.toml")
 DEFAULT_PREFIX_DIR: Path = Path.home() / ".local/share/wineprefixes/"
+CACHE_DIR: Path = Path.home() / ".cache/umu-commander"
+PREFIX_TEMPLATE_DIR: Path = Path.home() / ".local/share/umu-commander/templates"
+UNLINKED_SWEEP_INTERVAL: int = 24
 DLL_OVERRIDES_OPTIONS: tuple[Element, ...] = (
     Element("winhttp.dll=n,b;", "winhttp for BepInEx"),
 )
@@ -39,7 +41,7 @@ def load():
         setattr(
             module,
             "PROTON_PATHS",
-            (Path(proton_dir) for proton_dir in toml_conf["PROTON_PATHS"]),
+            tuple(Path(proton_dir) for proton_dir in toml_conf["PROTON_PATHS"]),
         )
         del toml_conf["PROTON_PATHS"]
 
@@ -48,7 +50,7 @@ def load():
             setattr(
                 module,
                 f"{key}_OVERRIDES_OPTIONS",
-                (
+                tuple(
                     Element(value, name)
                     for name, value in toml_conf[f"{key}_OVERRIDES_OPTIONS"].items()
                 ),
@@ -56,7 +58,7 @@ def load():
             del toml_conf[f"{key}_OVERRIDES_OPTIONS"]
 
         for key, value in toml_conf.items():
-            setattr(module, key, Path(value))
+            setattr(module, key, Path(value) if isinstance(value, str) else value)
 
 
 def _get_attributes() -> dict[str, Any]:
@@ -73,7 +75,9 @@ def dump():
     if not os.path.exists(CONFIG_DIR):
         os.mkdir(CONFIG_DIR)
 
-    with open(os.path.join(CONFIG_DIR, CONFIG_NAME), "wb") as conf_file:
+    import tomli_w
+
+    with atomic_open(CONFIG_DIR / CONFIG_NAME, "wb") as conf_file:
         toml_conf = _get_attributes()
         del toml_conf["CONFIG_DIR"]
         del toml_conf["CONFIG_NAME"]
@@ -89,6 +93,6 @@ def dump():
                     }
 
                 case _:
-                    toml_conf[key] = str(value)
+                    toml_conf[key] = str(value) if isinstance(value, Path) else value
 
         tomli_w.dump(toml_conf, conf_file)
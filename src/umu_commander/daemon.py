@@ -0,0 +1,210 @@
+import io
+import json
+import os
+import select
+import signal
+import socket
+import sys
+import threading
+from argparse import Namespace
+from collections.abc import Callable
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from typing import Any
+
+import umu_commander.configuration as config
+from umu_commander import database as db
+from umu_commander import tracking
+
+# Seconds between checks for a stop request while idle.
+POLL_INTERVAL: float = 1.0
+# Seconds a client waits for the daemon to take its request before running it
+# itself, the daemon answers one request at a time.
+ACCEPT_TIMEOUT: float = 2.0
+
+_stop = threading.Event()
+
+
+def socket_path() -> Path:
+    # Not CACHE_DIR, clients look for the daemon before loading the config.
+    if (runtime_dir := os.environ.get("XDG_RUNTIME_DIR")) is not None:
+        return Path(runtime_dir) / "umu-commander.sock"
+
+    return Path.home() / ".cache/umu-commander/daemon.sock"
+
+
+def forwardable(args: Namespace) -> bool:
+    """Returns whether the verb can run in the daemon, it has to be one that never
+    prompts and does not launch anything or read stdin.
+    """
+    match args.verb:
+        case "untrack" | "fix" | "usage" | "scan" | "dedupe":
+            return True
+
+        case "track":
+            return args.proton is not None and (
+                args.input is not None or not args.interactive
+            )
+
+        case "users":
+            return args.proton is not None
+
+        case "create":
+            return not args.interactive and args.input is not None
+
+        case "batch":
+            return args.input is not None and str(args.input) != "-"
+
+        case _:
+            return False
+
+
+def request(argv: list[str], cwd: Path = None) -> dict[str, Any] | None:
+    """Runs the arguments in the daemon and returns its response, or None if no
+    daemon is running, it did not take the request within ACCEPT_TIMEOUT or
+    could not be reached.
+    """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(ACCEPT_TIMEOUT)
+            client.connect(str(socket_path()))
+            with client.makefile("rwb") as stream:
+                message: dict[str, Any] = {
+                    "argv": argv,
+                    "cwd": str(cwd if cwd is not None else Path.cwd()),
+                }
+                stream.write(json.dumps(message).encode() + b"\n")
+                stream.flush()
+                if stream.readline() == b"":
+                    return None
+
+                # Taken requests are waited for, running them again here could
+                # apply their changes twice.
+                client.settimeout(None)
+                response: bytes = stream.readline()
+
+    except OSError:
+        return None
+
+    if response == b"":
+        return None
+
+    return json.loads(response)
+
+
+def _disk_state() -> tuple[tuple[int, int, int] | None, ...]:
+    """Returns the identity of the config and DB files, to notice outside writes."""
+    state: list[tuple[int, int, int] | None] = []
+    for path in (
+        config.CONFIG_DIR / config.CONFIG_NAME,
+        db._snapshot_path(),
+        db._journal_path(),
+    ):
+        try:
+            path_stat = path.stat()
+            state.append((path_stat.st_ino, path_stat.st_mtime_ns, path_stat.st_size))
+
+        except FileNotFoundError:
+            state.append(None)
+
+    return tuple(state)
+
+
+def _running(path: Path) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(str(path))
+            return True
+
+        except (FileNotFoundError, ConnectionRefusedError):
+            return False
+
+
+def _handle(connection: socket.socket, execute: Callable[[list[str]], int]):
+    with connection, connection.makefile("rwb") as stream:
+        message: dict[str, Any] = json.loads(stream.readline())
+        # Tells the client its request was taken.
+        stream.write(b"{}\n")
+        stream.flush()
+
+        stdout, stderr = io.StringIO(), io.StringIO()
+        code: int = 0
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            try:
+                os.chdir(message["cwd"])
+                code = execute(message["argv"])
+
+            except SystemExit as e:
+                code = e.code if isinstance(e.code, int) else 1
+
+            except Exception as e:
+                print(f"{type(e).__name__}: {e}", file=sys.stderr)
+                code = 1
+
+        response: dict[str, Any] = {
+            "stdout": stdout.getvalue(),
+            "stderr": stderr.getvalue(),
+            "code": code,
+        }
+        stream.write(json.dumps(response).encode() + b"\n")
+
+
+def serve(execute: Callable[[list[str]], int], reload: Callable[[], Any]):
+    """Answers requests one at a time until SIGINT or SIGTERM, execute runs the
+    arguments of a request and reload reads the config and DB again.
+
+    The config and DB are only read again when another process changed them,
+    changes are written once the response has been sent.
+    """
+    path: Path = socket_path()
+    if _running(path):
+        print(f"A daemon is already listening on {path}.")
+        return
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.unlink(missing_ok=True)
+
+    if threading.current_thread() is threading.main_thread():
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signal_number, lambda *_: _stop.set())
+
+    _stop.clear()
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        # Created owner only, a chmod afterwards would leave a window where
+        # other users could connect.
+        umask: int = os.umask(0o177)
+        try:
+            server.bind(str(path))
+        finally:
+            os.umask(umask)
+
+        server.listen()
+
+        disk_state = _disk_state()
+        try:
+            while not _stop.is_set():
+                try:
+                    ready, _, _ = select.select([server], [], [], POLL_INTERVAL)
+                except InterruptedError:
+                    continue
+
+                if len(ready) == 0:
+                    continue
+
+                connection, _ = server.accept()
+                if _disk_state() != disk_state:
+                    reload()
+
+                try:
+                    _handle(connection, execute)
+
+                except (OSError, ValueError, KeyError):
+                    # The client went away or did not send a request.
+                    pass
+
+                tracking.maintenance()
+                db.dump()
+                disk_state = _disk_state()
+
+        finally:
+            path.unlink(missing_ok=True)
@@ -1,68 +1,422 @@
+import fcntl
 import json
-from collections import defaultdict
+import os
+from collections.abc import Iterator
+from contextlib import contextmanager
 from pathlib import Path
 
 import umu_commander.configuration as config
+from umu_commander import sqlite_database
+from umu_commander.files import atomic_open
+from umu_commander.profiling import timed
 
-_db: defaultdict[Path, defaultdict[Path, list[Path]]] = defaultdict(
-    lambda: defaultdict(list)
-)
+# DB_NAME suffixes that select the SQLite backend over the JSON snapshot.
+SQLITE_SUFFIXES: tuple[str, ...] = (".db", ".sqlite", ".sqlite3")
 
+# Journal records past this count get folded back into the snapshot on dump.
+JOURNAL_COMPACT_THRESHOLD: int = 256
 
-def load():
-    global _db
+# Every path and version name is stored once, records refer to it by index.
+# Strings of removed entries are only dropped when the DB is next loaded.
+_strings: list[str] = []
+_string_ids: dict[str, int] = {}
 
-    if not config.DB_DIR.exists():
-        config.DB_DIR.mkdir()
 
-    with open(config.DB_DIR / config.DB_NAME, "rt") as db_file:
-        db: dict[Path, dict[Path, list[Path]]] = {}
+class _Version:
+    """A tracked Proton version, users is an insertion ordered set of config IDs."""
+
+    __slots__ = ("dir_id", "name_id", "users")
+
+    def __init__(self, dir_id: int, name_id: int):
+        self.dir_id: int = dir_id
+        self.name_id: int = name_id
+        self.users: dict[int, None] = {}
+
+
+# Proton dir ID to version name ID to version.
+_versions: dict[int, dict[int, _Version]] = {}
+# Reverse index, config ID to the version tracking it.
+_users: dict[int, _Version] = {}
+# Records applied in memory but not yet appended to the journal file.
+_pending: list[dict[str, str]] = []
+# Records currently stored in the journal file, and their length in bytes.
+_journal_length: int = 0
+_journal_offset: int = 0
+# Identity of the snapshot the in-memory DB was read from, None if there was none.
+_snapshot_id: tuple[int, int, int] | None = None
+
+
+def _use_sqlite() -> bool:
+    return config.DB_NAME.suffix in SQLITE_SUFFIXES
+
+
+def _snapshot_path() -> Path:
+    return config.DB_DIR / config.DB_NAME
+
+
+def _journal_path() -> Path:
+    return config.DB_DIR / (str(config.DB_NAME) + ".journal")
+
+
+def _lock_path() -> Path:
+    return config.DB_DIR / (str(config.DB_NAME) + ".lock")
+
+
+@contextmanager
+def _locked(operation: int = fcntl.LOCK_EX) -> Iterator[None]:
+    """Holds the advisory lock writers take around reading and writing the files."""
+    with open(_lock_path(), "ab") as lock_file:
+        fcntl.flock(lock_file, operation)
+        yield
+
+
+def _file_id(path: Path) -> tuple[int, int, int] | None:
+    try:
+        file_stat = path.stat()
+        return file_stat.st_ino, file_stat.st_mtime_ns, file_stat.st_size
+
+    except FileNotFoundError:
+        return None
+
+
+def _intern(string: str) -> int:
+    if (string_id := _string_ids.get(string)) is None:
+        string_id = len(_strings)
+        _strings.append(string)
+        _string_ids[string] = string_id
+
+    return string_id
+
+
+def _find_version(proton_dir: str, proton_ver: str) -> _Version | None:
+    dir_id: int | None = _string_ids.get(proton_dir)
+    name_id: int | None = _string_ids.get(proton_ver)
+    if dir_id is None or name_id is None:
+        return None
+
+    return _versions.get(dir_id, {}).get(name_id)
+
+
+def _get_version(proton_dir: str, proton_ver: str) -> _Version:
+    dir_id: int = _intern(proton_dir)
+    name_id: int = _intern(proton_ver)
+    versions: dict[int, _Version] = _versions.setdefault(dir_id, {})
+    if (version := versions.get(name_id)) is None:
+        version = versions[name_id] = _Version(dir_id, name_id)
+
+    return version
+
+
+def _add(version: _Version, user: str):
+    # A config is tracked by a single version, tracking it again moves it.
+    user_id: int = _intern(user)
+    if (previous := _users.get(user_id)) is version:
+        return
+
+    if previous is not None:
+        del previous.users[user_id]
+
+    version.users[user_id] = None
+    _users[user_id] = version
+
+
+def _apply(record: dict[str, str]):
+    match record["op"]:
+        case "add":
+            _add(_get_version(record["dir"], record["ver"]), record["user"])
+
+        case "remove":
+            version = _find_version(record["dir"], record["ver"])
+            user_id: int | None = _string_ids.get(record["user"])
+            if version is not None and _users.get(user_id) is version:
+                del version.users[user_id]
+                del _users[user_id]
+
+        case "delete":
+            if (version := _find_version(record["dir"], record["ver"])) is not None:
+                del _versions[version.dir_id][version.name_id]
+                for user_id in version.users:
+                    del _users[user_id]
+
+
+def _version_path(version: _Version) -> Path:
+    return Path(_strings[version.dir_id], _strings[version.name_id])
+
+
+def _user_paths(version: _Version) -> dict[Path, None]:
+    return {Path(_strings[user_id]): None for user_id in version.users}
+
+
+def _record(op: str, proton_dir: Path, proton_ver: Path, user: Path = None):
+    record: dict[str, str] = {"op": op, "dir": str(proton_dir), "ver": proton_ver.name}
+    if user is not None:
+        record["user"] = str(user)
+
+    _apply(record)
+    _pending.append(record)
+
+
+def _clear():
+    _strings.clear()
+    _string_ids.clear()
+    _versions.clear()
+    _users.clear()
+
+
+def _read_files():
+    """Reads the snapshot and the complete records of the journal."""
+    global _journal_length, _journal_offset, _snapshot_id
+
+    _snapshot_id = _file_id(_snapshot_path())
+    with open(_snapshot_path(), "rt") as db_file:
         for proton_dir, proton_vers in json.load(db_file).items():
-            proton_dir = Path(proton_dir)
-            db[proton_dir] = {}
             for proton_ver, proton_users in proton_vers.items():
-                proton_ver = proton_dir / proton_ver
-                db[proton_dir][proton_ver] = [Path(user) for user in proton_users]
+                version = _get_version(proton_dir, proton_ver)
+                for user in proton_users:
+                    _add(version, user)
+
+    # Replaying is safe even if a crash left records that are already part of
+    # the snapshot, applying the same history again reaches the same state.
+    _journal_length = 0
+    _journal_offset = 0
+    try:
+        with open(_journal_path(), "rb") as journal_file:
+            for line in journal_file:
+                try:
+                    # Torn final record from an interrupted append.
+                    if not line.endswith(b"\n"):
+                        break
+
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+
+                _apply(record)
+                _journal_length += 1
+                _journal_offset += len(line)
+
+    except FileNotFoundError:
+        pass
+
+
+def _catch_up():
+    """Reads what other processes wrote since the DB was read, then applies the
+    pending records on top again. Only call while holding the lock.
+    """
+    global _snapshot_id
+
+    journal_id = _file_id(_journal_path())
+    if _file_id(_snapshot_path()) == _snapshot_id and _journal_offset == (
+        journal_id[2] if journal_id is not None else 0
+    ):
+        return
+
+    pending: list[dict[str, str]] = [*_pending]
+    _clear()
+    try:
+        _read_files()
+
+    except FileNotFoundError:
+        _snapshot_id = None
+
+    for record in pending:
+        _apply(record)
+    _pending[:] = pending
+
+
+def _compact():
+    global _journal_length, _journal_offset, _snapshot_id
+
+    db: dict[str, dict[str, list[str]]] = {}
+    for dir_id, versions in _versions.items():
+        db[_strings[dir_id]] = {
+            _strings[name_id]: [_strings[user_id] for user_id in version.users]
+            for name_id, version in versions.items()
+        }
+
+    with atomic_open(_snapshot_path(), "wt") as db_file:
         # noinspection PyTypeChecker
-        _db.update(db)
+        json.dump(db, db_file, indent="\t")
+
+    _snapshot_id = _file_id(_snapshot_path())
+    _journal_path().unlink(missing_ok=True)
+    _pending.clear()
+    _journal_length = 0
+    _journal_offset = 0
+
 
+@timed("database.load")
+def load(*, migrate: bool = True):
+    """Reads the DB, migrate copies a JSON DB of the same name into new SQLite DBs."""
+    if _use_sqlite():
+        sqlite_database.load(migrate=migrate)
+        return
+
+    if not config.DB_DIR.exists():
+        config.DB_DIR.mkdir()
 
+    # Shared, so a snapshot is never read alongside the journal it replaced.
+    with _locked(fcntl.LOCK_SH):
+        _read_files()
+
+
+@timed("database.compact")
+def compact():
+    if _use_sqlite():
+        sqlite_database.compact()
+        return
+
+    if not config.DB_DIR.exists():
+        config.DB_DIR.mkdir()
+
+    with _locked():
+        _catch_up()
+        _compact()
+
+
+@timed("database.dump")
 def dump():
+    """Writes pending changes, merged with changes other processes wrote since
+    the DB was read. Only the records are appended unless the journal is due
+    for compaction.
+    """
+    global _journal_length, _journal_offset
+
+    if _use_sqlite():
+        sqlite_database.dump()
+        return
+
+    if not dirty():
+        return
+
     if not config.DB_DIR.exists():
         config.DB_DIR.mkdir()
 
-    db: dict[str, dict[str, list[str]]] = {}
-    for proton_dir, proton_vers in _db.items():
-        proton_dir = str(proton_dir)
-        db[proton_dir] = {}
-        for proton_ver, proton_users in proton_vers.items():
-            proton_ver = proton_ver.name
-            db[proton_dir][proton_ver] = list(
-                dict.fromkeys([str(user) for user in proton_users])
-            )
-
-    with open(config.DB_DIR / config.DB_NAME, "wt") as db_file:
-        # noinspection PyTypeChecker
-        json.dump(db, db_file, indent="\t")
+    with _locked():
+        _catch_up()
+
+        if (
+            _snapshot_id is None
+            or _journal_length + len(_pending) > JOURNAL_COMPACT_THRESHOLD
+        ):
+            _compact()
+            return
+
+        records: bytes = "".join(
+            json.dumps(record) + "\n" for record in _pending
+        ).encode()
+        with open(_journal_path(), "ab") as journal_file:
+            # Drops a torn record left by a writer that crashed mid append.
+            if journal_file.tell() > _journal_offset:
+                journal_file.truncate(_journal_offset)
+
+            journal_file.write(records)
+            journal_file.flush()
+            os.fsync(journal_file.fileno())
+
+        _journal_length += len(_pending)
+        _journal_offset += len(records)
+        _pending.clear()
+
+
+def dirty() -> bool:
+    """Returns whether the DB was modified since it was last loaded or dumped."""
+    if _use_sqlite():
+        return sqlite_database.dirty()
+
+    return len(_pending) > 0
 
 
 def get(
     proton_dir: Path = None, proton_ver: Path = None
-) -> dict[Path, dict[Path, list[Path]]] | dict[Path, list[Path]] | list[Path]:
-    global _db
+) -> (
+    dict[Path, dict[Path, dict[Path, None]]]
+    | dict[Path, dict[Path, None]]
+    | dict[Path, None]
+):
+    """Returns a copy of the DB, a Proton directory's versions or a version's users."""
+    if _use_sqlite():
+        return sqlite_database.get(proton_dir, proton_ver)
+
+    if proton_ver is not None:
+        version = _find_version(str(proton_dir), proton_ver.name)
+        return _user_paths(version) if version is not None else {}
+
+    dir_ids = _versions.keys()
+    if proton_dir is not None:
+        dir_id: int | None = _string_ids.get(str(proton_dir))
+        dir_ids = [dir_id] if dir_id is not None else []
+
+    db: dict[Path, dict[Path, dict[Path, None]]] = {}
+    for dir_id in dir_ids:
+        if dir_id in _versions:
+            db[Path(_strings[dir_id])] = {
+                _version_path(version): _user_paths(version)
+                for version in _versions[dir_id].values()
+            }
+
+    if proton_dir is None:
+        return db
+
+    return next(iter(db.values()), {})
+
+
+def count_users(proton_dir: Path, proton_ver: Path) -> int | None:
+    """Returns None if the version has never been tracked."""
+    if _use_sqlite():
+        return sqlite_database.count_users(proton_dir, proton_ver)
+
+    if (version := _find_version(str(proton_dir), proton_ver.name)) is None:
+        return None
+
+    return len(version.users)
+
+
+def find_user(user: Path) -> list[Path]:
+    """Returns every Proton version tracking the user."""
+    if _use_sqlite():
+        return sqlite_database.find_user(user)
+
+    version: _Version | None = _users.get(_string_ids.get(str(user)))
+    return [_version_path(version)] if version is not None else []
+
+
+def add_user(proton_dir: Path, proton_ver: Path, user: Path):
+    if _use_sqlite():
+        sqlite_database.add_user(proton_dir, proton_ver, user)
+        return
+
+    _record("add", proton_dir, proton_ver, user)
+
+
+def remove_user(proton_dir: Path, proton_ver: Path, user: Path):
+    if _use_sqlite():
+        sqlite_database.remove_user(proton_dir, proton_ver, user)
+        return
+
+    _record("remove", proton_dir, proton_ver, user)
+
 
-    if proton_dir is None and proton_ver is None:
-        return _db
+def remove_version(proton_dir: Path, proton_ver: Path):
+    if _use_sqlite():
+        sqlite_database.remove_version(proton_dir, proton_ver)
+        return
 
-    if proton_ver is None:
-        return _db[proton_dir]
+    _record("delete", proton_dir, proton_ver)
 
-    if proton_ver not in _db[proton_dir]:
-        _db[proton_dir][proton_ver] = []
 
-    return _db[proton_dir][proton_ver]
+def close():
+    """Forgets the loaded DB without saving it and closes the SQLite connection,
+    so the DB file can be replaced.
+    """
+    _reset()
 
 
 def _reset():
-    global _db
-    _db = defaultdict(lambda: defaultdict(list))
+    global _journal_length, _journal_offset, _snapshot_id
+    sqlite_database._reset()
+    _clear()
+    _pending.clear()
+    _journal_length = 0
+    _journal_offset = 0
+    _snapshot_id = None
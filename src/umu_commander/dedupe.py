@@ -0,0 +1,350 @@
+import hashlib
+import json
+import os
+import stat
+import time
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, NamedTuple
+
+import umu_commander.configuration as config
+from umu_commander.files import atomic_open, reflink
+from umu_commander.proton import RACY_WINDOW, collect_proton_versions
+from umu_commander.util import format_size
+
+# Files smaller than a filesystem block cannot free any space.
+MIN_SIZE: int = 4096
+
+# File identity, "dev:ino", to [mtime, size, digest].
+_hashes: dict[str, list[Any]] | None = None
+
+
+class File(NamedTuple):
+    path: str
+    dev: int
+    ino: int
+    size: int
+    mtime: int
+    mode: int
+    # Only files inside Proton versions may be hardlinked, Wine writes prefix
+    # files in place, which would change every linked copy.
+    linkable: bool
+
+
+def _hashes_path() -> Path:
+    return config.CACHE_DIR / "hashes.json"
+
+
+def _load_hashes() -> dict[str, list[Any]]:
+    global _hashes
+
+    if _hashes is None:
+        try:
+            with open(_hashes_path(), "rt") as hashes_file:
+                _hashes = json.load(hashes_file)
+
+        except (FileNotFoundError, json.JSONDecodeError):
+            _hashes = {}
+
+    return _hashes
+
+
+def _dump_hashes(seen: set[str]):
+    config.CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    with atomic_open(_hashes_path(), "wt") as hashes_file:
+        json.dump({key: _hashes[key] for key in seen if key in _hashes}, hashes_file)
+
+
+def _walk(root: Path, linkable: bool) -> Iterator[File]:
+    pending: list[str] = [str(root)]
+    while len(pending) > 0:
+        try:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    # A file removed mid scan only skips itself.
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                            continue
+
+                        file_stat = entry.stat(follow_symlinks=False)
+
+                    except OSError:
+                        continue
+
+                    if (
+                        stat.S_ISREG(file_stat.st_mode)
+                        and file_stat.st_size >= MIN_SIZE
+                    ):
+                        yield File(
+                            entry.path,
+                            file_stat.st_dev,
+                            file_stat.st_ino,
+                            file_stat.st_size,
+                            file_stat.st_mtime_ns,
+                            file_stat.st_mode,
+                            linkable,
+                        )
+
+        except OSError:
+            continue
+
+
+def _hash_file(path: str) -> str | None:
+    try:
+        with open(path, "rb") as file:
+            return hashlib.file_digest(file, "sha256").hexdigest()
+
+    except OSError:
+        return None
+
+
+def find_duplicates(roots: dict[Path, bool]) -> tuple[list[list[list[File]]], int]:
+    """Returns groups of identical files under roots, along with how many files
+    had to be hashed. Roots map to whether their files may be hardlinked.
+
+    Each group lists the inodes with the same content on one filesystem, each
+    inode the paths already linked to it. Only files sharing their size with
+    another inode are hashed, hashes are cached by inode, mtime and size.
+    """
+    hashes = _load_hashes()
+
+    # Links can only be made within a filesystem, so buckets are per device.
+    buckets: dict[tuple[int, int], dict[int, list[File]]] = {}
+    for root, linkable in roots.items():
+        for file in _walk(root, linkable):
+            buckets.setdefault((file.dev, file.size), {}).setdefault(
+                file.ino, []
+            ).append(file)
+
+    candidates: list[list[File]] = [
+        inode_files
+        for inodes in buckets.values()
+        if len(inodes) > 1
+        for inode_files in inodes.values()
+    ]
+
+    digests: dict[tuple[int, int], str] = {}
+    to_hash: list[File] = []
+    for inode_files in candidates:
+        file: File = inode_files[0]
+        key: str = f"{file.dev}:{file.ino}"
+        if (cached := hashes.get(key)) is not None and cached[:2] == [
+            file.mtime,
+            file.size,
+        ]:
+            digests[(file.dev, file.ino)] = cached[2]
+        else:
+            to_hash.append(file)
+
+    if len(to_hash) > 0:
+        with ProcessPoolExecutor(min(os.cpu_count() or 1, len(to_hash))) as executor:
+            for file, digest in zip(
+                to_hash,
+                executor.map(_hash_file, [file.path for file in to_hash], chunksize=16),
+            ):
+                if digest is None:
+                    continue
+
+                digests[(file.dev, file.ino)] = digest
+                # Files modified within the racy window could change again unnoticed.
+                if time.time_ns() - file.mtime > RACY_WINDOW:
+                    hashes[f"{file.dev}:{file.ino}"] = [file.mtime, file.size, digest]
+
+    groups: dict[tuple[int, int, str], list[list[File]]] = {}
+    for inode_files in candidates:
+        file = inode_files[0]
+        if (digest := digests.get((file.dev, file.ino))) is not None:
+            groups.setdefault((file.dev, file.size, digest), []).append(inode_files)
+
+    if len(to_hash) > 0 or len(hashes) != len(candidates):
+        _dump_hashes({f"{files[0].dev}:{files[0].ino}" for files in candidates})
+
+    return [group for group in groups.values() if len(group) > 1], len(to_hash)
+
+
+def _unchanged(file: File) -> bool:
+    try:
+        file_stat = os.stat(file.path, follow_symlinks=False)
+
+    except OSError:
+        return False
+
+    return (file_stat.st_ino, file_stat.st_mtime_ns, file_stat.st_size) == (
+        file.ino,
+        file.mtime,
+        file.size,
+    )
+
+
+def _reflink(source: File, target: File) -> bool:
+    """Replaces target with a reflink of source, returns False if the filesystem
+    does not support reflinks.
+    """
+    directory, name = os.path.split(target.path)
+    temp_path: str = os.path.join(directory, f".{name}.dedupe")
+    try:
+        if not reflink(source.path, temp_path):
+            return False
+
+        os.chmod(temp_path, stat.S_IMODE(target.mode))
+        os.utime(temp_path, ns=(target.mtime, target.mtime))
+        os.replace(temp_path, target.path)
+        return True
+
+    except OSError:
+        Path(temp_path).unlink(missing_ok=True)
+        raise
+
+
+def _hardlink(source: File, target: File):
+    directory, name = os.path.split(target.path)
+    temp_path: str = os.path.join(directory, f".{name}.dedupe")
+    os.link(source.path, temp_path)
+    try:
+        os.replace(temp_path, target.path)
+
+    except OSError:
+        Path(temp_path).unlink(missing_ok=True)
+        raise
+
+
+def _hardlinkable(source: File, target: File) -> bool:
+    return source.linkable and target.linkable and source.mode == target.mode
+
+
+def _ordered(group: list[list[File]]) -> list[list[File]]:
+    # Proton files are preferred as the source, so they can be hardlinked.
+    return sorted(group, key=lambda inode_files: not inode_files[0].linkable)
+
+
+def _supports_reflinks(source: File, target: File, reflinks: dict[int, bool]) -> bool:
+    """Returns whether the target's device supports reflinks, probing it with a
+    reflink of source next to target the first time.
+    """
+    if target.dev not in reflinks:
+        directory, name = os.path.split(target.path)
+        temp_path: str = os.path.join(directory, f".{name}.dedupe")
+        try:
+            reflinks[target.dev] = reflink(source.path, temp_path)
+
+        except OSError:
+            # Unknown, the next file on the device is probed again.
+            return False
+
+        finally:
+            Path(temp_path).unlink(missing_ok=True)
+
+    return reflinks[target.dev]
+
+
+def reclaimable(group: list[list[File]], reflinks: dict[int, bool]) -> int:
+    """Returns the bytes deduplicate would free, counting only inodes whose files
+    can all be reflinked or hardlinked to the source.
+    """
+    group = _ordered(group)
+    source: File = group[0][0]
+    return sum(
+        source.size
+        for inode_files in group[1:]
+        if all(
+            _hardlinkable(source, target)
+            or _supports_reflinks(source, target, reflinks)
+            for target in inode_files
+        )
+    )
+
+
+def deduplicate(group: list[list[File]], reflinks: dict[int, bool]) -> tuple[int, int]:
+    """Points every inode in the group at the first one, returns the bytes freed
+    and the number of files left alone.
+
+    reflinks remembers which devices support reflinks. Hardlinks are only used
+    between linkable files of the same mode. Files that cannot be replaced,
+    such as ones in read-only directories, are left alone.
+    """
+    group = _ordered(group)
+    source: File = group[0][0]
+    if not _unchanged(source):
+        return 0, sum(len(inode_files) for inode_files in group[1:])
+
+    freed: int = 0
+    skipped: int = 0
+    for inode_files in group[1:]:
+        replaced: int = 0
+        for target in inode_files:
+            if not _unchanged(target):
+                continue
+
+            try:
+                if reflinks.get(target.dev, True):
+                    reflinks[target.dev] = _reflink(source, target)
+                    if reflinks[target.dev]:
+                        replaced += 1
+                        continue
+
+                if _hardlinkable(source, target):
+                    _hardlink(source, target)
+                    replaced += 1
+
+            except OSError:
+                continue
+
+        # The data is only freed once no path refers to the old inode.
+        skipped += len(inode_files) - replaced
+        if replaced == len(inode_files):
+            freed += source.size
+
+    return freed, skipped
+
+
+def dedupe(*, dry_run: bool = False, quiet: bool = False) -> int:
+    """Deduplicates Proton versions and prefixes, returns the bytes reclaimed, or
+    reclaimable on a dry run.
+    """
+    roots: dict[Path, bool] = {
+        proton_ver: True
+        for proton_vers in collect_proton_versions().values()
+        for proton_ver in proton_vers
+    }
+    if config.DEFAULT_PREFIX_DIR.is_dir():
+        roots.update(
+            (prefix, False)
+            for prefix in config.DEFAULT_PREFIX_DIR.iterdir()
+            if prefix.is_dir()
+        )
+
+    groups, hashed = find_duplicates(roots)
+    if not quiet:
+        print(
+            f"Hashed {hashed} files, found {sum(len(group) - 1 for group in groups)} duplicates of {len(groups)} files."
+        )
+
+    reflinks: dict[int, bool] = {}
+    if dry_run:
+        total: int = sum(reclaimable(group, reflinks) for group in groups)
+        if not quiet:
+            print(f"Reclaimable with dedupe: {format_size(total)}.")
+        return total
+
+    freed: int = 0
+    skipped: int = 0
+    for group in groups:
+        group_freed, group_skipped = deduplicate(group, reflinks)
+        freed += group_freed
+        skipped += group_skipped
+
+    if not quiet:
+        if skipped > 0:
+            print(
+                f"Left {skipped} files alone, they changed, could not be replaced, or are prefix files on filesystems without reflinks."
+            )
+        print(f"Reclaimed {format_size(freed)}.")
+
+    return freed
+
+
+def _reset():
+    global _hashes
+    _hashes = None
@@ -0,0 +1,133 @@
+import errno
+import fcntl
+import os
+import shutil
+import stat
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO
+
+# Linux ioctl that makes a file share the extents of another.
+FICLONE: int = 0x40049409
+# Errors meaning the filesystem cannot reflink the file.
+NO_REFLINK_ERRORS: tuple[int, ...] = (
+    errno.EOPNOTSUPP,
+    errno.ENOTTY,
+    errno.EXDEV,
+    errno.EINVAL,
+    errno.ENOSYS,
+)
+
+
+def _proc_umask() -> int | None:
+    # Read without setting it, other threads may be creating files meanwhile.
+    try:
+        with open("/proc/self/status", "rt") as status_file:
+            for line in status_file:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+
+    except (OSError, ValueError, IndexError):
+        pass
+
+    return None
+
+
+# Without /proc the umask can only be read by setting it, which is done once on
+# import, before any threads are started.
+_umask: int | None = None
+if _proc_umask() is None:
+    _umask = os.umask(0o022)
+    os.umask(_umask)
+
+
+def _get_umask() -> int:
+    if (umask := _proc_umask()) is not None:
+        return umask
+
+    return _umask
+
+
+@contextmanager
+def atomic_open(path: Path, mode: str = "wt") -> Iterator[IO]:
+    """Writes to a temporary file that only replaces path once fully on disk.
+
+    The file keeps the mode of the one it replaces, new files get the mode
+    open() would give them.
+    """
+    # Only imported when writing, which launching rarely does.
+    import tempfile
+
+    fd, temp_path = tempfile.mkstemp(
+        prefix=f".{path.name}.", suffix=".tmp", dir=path.parent
+    )
+
+    try:
+        with os.fdopen(fd, mode) as file:
+            # mkstemp creates files only their owner can read.
+            try:
+                os.fchmod(fd, stat.S_IMODE(path.stat().st_mode))
+            except FileNotFoundError:
+                os.fchmod(fd, 0o666 & ~_get_umask())
+
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+
+        os.replace(temp_path, path)
+
+    except BaseException:
+        Path(temp_path).unlink(missing_ok=True)
+        raise
+
+
+def tree_size(path: Path) -> int:
+    """Returns the apparent size of every file under path, without following symlinks."""
+    size: int = 0
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    size += tree_size(Path(entry.path))
+                else:
+                    size += entry.stat(follow_symlinks=False).st_size
+
+    except FileNotFoundError:
+        pass
+
+    return size
+
+
+def reflink(source: str | Path, target: str | Path) -> bool:
+    """Creates target sharing the extents of source, returns False if the
+    filesystem does not support reflinks. target must not exist.
+    """
+    with open(source, "rb") as source_file, open(target, "xb") as target_file:
+        try:
+            fcntl.ioctl(target_file.fileno(), FICLONE, source_file.fileno())
+            return True
+
+        except OSError as e:
+            error: OSError = e
+
+    # The empty target is removed on any failure.
+    os.unlink(target)
+    if error.errno not in NO_REFLINK_ERRORS:
+        raise error
+
+    return False
+
+
+def clone_file(
+    source: str | Path, target: str | Path, *, try_reflink: bool = True
+) -> bool:
+    """Copies source to target with its mode, as a reflink when possible. Returns
+    whether a reflink was made.
+    """
+    if try_reflink and reflink(source, target):
+        shutil.copymode(source, target)
+        return True
+
+    shutil.copy(source, target)
+    return False
@@ -0,0 +1,190 @@
+import hashlib
+import json
+import os
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+
+import umu_commander.configuration as config
+from umu_commander.files import atomic_open
+
+# Read by launchers that cannot pass --prewarm, one of LEVELS.
+PREWARM_ENV: str = "UMU_COMMANDER_PREWARM"
+# What run reads ahead, the Proton version alone or also the prefix's DLLs.
+LEVELS: tuple[str, ...] = ("proton", "all")
+# Files opened at once, opening is what stalls on network storage.
+PREWARM_WORKERS: int = 8
+# Bytes read ahead for versions that have not been launched with prewarm yet.
+UNLEARNED_BUDGET: int = 512 * 1024**2
+LIBRARY_SUFFIXES: tuple[str, ...] = (".dll", ".so", ".exe", ".drv", ".sys")
+# relatime only updates atimes older than a day, so files read within a day
+# before a launch cannot be told apart from unused ones.
+RELATIME_WINDOW: int = 24 * 3600 * 10**9
+# Filesystem timestamps come from a coarse clock, or have a resolution of a
+# second, so atimes of files read right after a launch can predate it.
+TIMESTAMP_SLACK: int = 10**9
+# Weight kept by a file's score per launch it was not used in.
+DECAY: float = 0.5
+MIN_SCORE: float = 0.1
+
+
+def _manifest_path(proton_ver: Path) -> Path:
+    digest: str = hashlib.sha1(str(proton_ver).encode()).hexdigest()[:8]
+    return config.CACHE_DIR / "prewarm" / f"{proton_ver.name}-{digest}.json"
+
+
+def _load_manifest(proton_ver: Path) -> dict[str, float]:
+    """Returns the files of the version used by earlier launches, relative to it,
+    and how often they were used.
+    """
+    try:
+        with open(_manifest_path(proton_ver), "rt") as manifest_file:
+            return json.load(manifest_file)
+
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def _dump_manifest(proton_ver: Path, manifest: dict[str, float]):
+    _manifest_path(proton_ver).parent.mkdir(parents=True, exist_ok=True)
+    with atomic_open(_manifest_path(proton_ver), "wt") as manifest_file:
+        json.dump(manifest, manifest_file)
+
+
+def _walk(root: Path) -> Iterator[os.DirEntry]:
+    pending: list[str] = [str(root)]
+    while len(pending) > 0:
+        try:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry
+
+        except OSError:
+            continue
+
+
+def _libraries(root: Path, budget: int) -> list[str]:
+    paths: list[str] = []
+    for entry in _walk(root):
+        if entry.name.endswith(LIBRARY_SUFFIXES) or ".so." in entry.name:
+            try:
+                budget -= entry.stat(follow_symlinks=False).st_size
+            except OSError:
+                continue
+
+            if budget < 0:
+                break
+
+            paths.append(entry.path)
+
+    return paths
+
+
+def files_to_prewarm(proton_ver: Path, prefix: Path = None) -> list[str]:
+    """Returns the files to read ahead, the version's hottest files first.
+
+    Versions without a manifest read ahead libraries up to UNLEARNED_BUDGET.
+    """
+    manifest: dict[str, float] = _load_manifest(proton_ver)
+    if len(manifest) > 0:
+        paths: list[str] = [
+            str(proton_ver / path)
+            for path in sorted(manifest, key=manifest.__getitem__, reverse=True)
+        ]
+    else:
+        paths = _libraries(proton_ver, UNLEARNED_BUDGET)
+
+    if prefix is not None:
+        for system_dir in ("system32", "syswow64"):
+            paths.extend(
+                _libraries(prefix / "drive_c/windows" / system_dir, UNLEARNED_BUDGET)
+            )
+
+    return paths
+
+
+def _advise(path: str):
+    try:
+        fd: int = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+
+    except OSError:
+        pass
+
+
+def _prewarm(proton_ver: Path, prefix: Path | None, stop: threading.Event):
+    paths: Iterator[str] = iter(files_to_prewarm(proton_ver, prefix))
+    lock = threading.Lock()
+
+    def work():
+        while not stop.is_set():
+            with lock:
+                path: str | None = next(paths, None)
+
+            if path is None:
+                return
+
+            _advise(path)
+
+    # Daemon threads rather than an executor, whose workers are joined at exit,
+    # so an unfinished prewarm does not keep umu-commander running.
+    workers: list[threading.Thread] = [
+        threading.Thread(target=work, daemon=True) for _ in range(PREWARM_WORKERS)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+def start(proton_ver: Path, prefix: Path = None) -> threading.Event:
+    """Asks the kernel to read the Proton version's files into the page cache in
+    the background, along with the prefix's system DLLs if prefix is given.
+
+    Setting the returned event stops reading ahead further files.
+    """
+    stop = threading.Event()
+    threading.Thread(
+        target=_prewarm, args=(proton_ver, prefix, stop), daemon=True
+    ).start()
+    return stop
+
+
+def learn(proton_ver: Path, launched: int):
+    """Updates the version's manifest with the files read since launched, in ns.
+
+    Reading ahead does not update atimes, so only the launch itself counts.
+    Volumes mounted with noatime never mark files as used. A manifest that
+    cannot be written is left as it was.
+    """
+    manifest: dict[str, float] = _load_manifest(proton_ver)
+    learned: dict[str, float] = {}
+    for entry in _walk(proton_ver):
+        path: str = os.path.relpath(entry.path, proton_ver)
+        score: float = manifest.get(path, 0.0)
+        try:
+            atime: int = entry.stat(follow_symlinks=False).st_atime_ns
+        except OSError:
+            continue
+
+        if atime >= launched - TIMESTAMP_SLACK:
+            score = score * DECAY + 1
+
+        elif launched - atime > RELATIME_WINDOW:
+            score *= DECAY
+
+        if score >= MIN_SCORE:
+            learned[path] = score
+
+    if learned != manifest:
+        try:
+            _dump_manifest(proton_ver, learned)
+        except OSError:
+            pass
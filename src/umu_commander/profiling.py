@@ -0,0 +1,153 @@
+import functools
+import json
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+from umu_commander.files import atomic_open
+
+# Path of the report, set by wrappers that cannot pass --profile.
+PROFILE_ENV: str = "UMU_COMMANDER_PROFILE"
+# Comma separated extra captures, "cprofile" and/or "tracemalloc".
+PROFILE_CAPTURE_ENV: str = "UMU_COMMANDER_PROFILE_CAPTURE"
+CAPTURES: tuple[str, ...] = ("cprofile", "tracemalloc")
+# Functions and allocation sites kept in the report.
+REPORT_TOP: int = 30
+
+_enabled: bool = False
+_start: int = 0
+_spans: list[dict[str, Any]] = []
+_profiler = None
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def start(captures: Iterable[str] = ()):
+    """Starts recording spans, along with the requested captures."""
+    global _enabled, _start, _profiler
+
+    _enabled = True
+    _start = time.perf_counter_ns()
+
+    if "tracemalloc" in captures:
+        import tracemalloc
+
+        tracemalloc.start()
+
+    if "cprofile" in captures:
+        import cProfile
+
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[None]:
+    """Records how long the block took, does nothing unless profiling started."""
+    if not _enabled:
+        yield
+        return
+
+    start_ns: int = time.perf_counter_ns()
+    try:
+        yield
+
+    finally:
+        end_ns: int = time.perf_counter_ns()
+        _spans.append(
+            {
+                "name": name,
+                "start": (start_ns - _start) / 1e9,
+                "duration": (end_ns - start_ns) / 1e9,
+                "thread": threading.current_thread().name,
+                **attributes,
+            }
+        )
+
+
+def timed(name: str) -> Callable[[Callable], Callable]:
+    """Decorator recording every call of the function as a span."""
+
+    def decorator(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+
+            with span(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _cprofile_report() -> list[dict[str, Any]]:
+    import pstats
+
+    _profiler.disable()
+    stats = pstats.Stats(_profiler).stats
+    functions = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)
+    return [
+        {
+            "function": f"{file}:{line}({function})",
+            "calls": calls,
+            "total": total,
+            "cumulative": cumulative,
+        }
+        for (file, line, function), (_, calls, total, cumulative, _) in functions[
+            :REPORT_TOP
+        ]
+    ]
+
+
+def _tracemalloc_report() -> dict[str, Any]:
+    import tracemalloc
+
+    current, peak = tracemalloc.get_traced_memory()
+    statistics = tracemalloc.take_snapshot().statistics("lineno")[:REPORT_TOP]
+    tracemalloc.stop()
+    return {
+        "current": current,
+        "peak": peak,
+        "top": [
+            {
+                "location": str(statistic.traceback),
+                "size": statistic.size,
+                "count": statistic.count,
+            }
+            for statistic in statistics
+        ],
+    }
+
+
+def report(path: Path):
+    """Writes the spans and captures recorded since start to path as JSON."""
+    global _enabled, _profiler
+
+    import tracemalloc
+
+    profile: dict[str, Any] = {
+        "argv": sys.argv,
+        "total": (time.perf_counter_ns() - _start) / 1e9,
+        "spans": sorted(_spans, key=lambda recorded: recorded["start"]),
+    }
+    if _profiler is not None:
+        profile["cprofile"] = _cprofile_report()
+
+    if tracemalloc.is_tracing():
+        profile["tracemalloc"] = _tracemalloc_report()
+
+    _enabled = False
+    _profiler = None
+    _spans.clear()
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with atomic_open(path, "wt") as profile_file:
+        json.dump(profile, profile_file, indent="\t")
@@ -1,9 +1,28 @@
+import json
+import os
 import re
 import subprocess
-from collections.abc import Iterable
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import Any
 
 import umu_commander.configuration as config
+from umu_commander.files import atomic_open
+from umu_commander.profiling import timed
+from umu_commander.Types import ProtonUpdate
+
+# Directories modified this recently (in ns) may change again within the same
+# timestamp tick, so their cache entries are not trusted on the next call.
+RACY_WINDOW: int = 2_000_000_000
+# Seconds to wait for a background umu Proton update before using what is installed.
+UPDATE_TIMEOUT: int = 60
+
+_inventory: dict[str, dict[str, Any]] | None = None
+_update: Future | None = None
+_update_process: subprocess.Popen | None = None
 
 
 def _natural_sort_proton_ver_key(p: Path, _nsre=re.compile(r"(\d+)")):
@@ -11,55 +30,248 @@ def _natural_sort_proton_ver_key(p: Path, _nsre=re.compile(r"(\d+)")):
     return [int(text) if text.isdigit() else text for text in _nsre.split(s)]
 
 
-def update_proton_versions():
-    print("Updating umu Proton.")
-    umu_update_process = subprocess.run(
+def _parse_proton_path(line: str) -> ProtonUpdate | None:
+    key: int = line.find("PROTONPATH")
+    if key == -1 or (start := line.find("/", key)) == -1:
+        return None
+
+    path = Path(line[start:].strip().strip("'\","))
+    return ProtonUpdate(path.name, path)
+
+
+@timed("proton.fetch_latest_umu_proton")
+def fetch_latest_umu_proton() -> ProtonUpdate | None:
+    """Updates umu Proton with umu-run and returns the build it settled on.
+
+    umu-run's debug log is read as it is written, and umu-run is stopped once
+    it logs the resolved PROTONPATH, instead of letting it go on to start the
+    empty executable.
+    """
+    return _read_update(_spawn_update())
+
+
+def _spawn_update() -> subprocess.Popen:
+    return subprocess.Popen(
         ["umu-run", '""'],
-        env={"PROTONPATH": "UMU-Latest", "UMU_LOG": "debug"},
-        capture_output=True,
+        env={**os.environ, "PROTONPATH": "UMU-Latest", "UMU_LOG": "debug"},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
         text=True,
     )
 
-    for line in umu_update_process.stderr.split("\n"):
-        if "PROTONPATH" in line and "/" in line:
-            try:
-                left: int = line.rfind("/") + 1
-                print(f"Latest UMU-Proton: {line[left:len(line) - 1]}.")
-            except ValueError:
-                print("Could not fetch latest UMU-Proton.")
 
-            break
+def _stop(umu_update_process: subprocess.Popen):
+    umu_update_process.terminate()
+    try:
+        umu_update_process.wait(5)
+    except subprocess.TimeoutExpired:
+        umu_update_process.kill()
+        umu_update_process.wait()
 
 
-def collect_proton_versions(sort: bool = False) -> dict[Path, Iterable[Path]]:
-    versions: dict[Path, Iterable[Path]] = {}
-    for proton_dir in config.PROTON_PATHS:
-        dir_versions = [version for version in proton_dir.iterdir() if version.is_dir()]
-        if len(dir_versions) == 0:
-            continue
-        else:
-            versions[proton_dir] = dir_versions
+def _read_update(umu_update_process: subprocess.Popen) -> ProtonUpdate | None:
+    latest: ProtonUpdate | None = None
+    with umu_update_process.stderr:
+        for line in umu_update_process.stderr:
+            if (latest := _parse_proton_path(line)) is not None:
+                break
 
-        if sort:
-            versions[proton_dir] = sorted(
-                versions[proton_dir], key=_natural_sort_proton_ver_key, reverse=True
-            )
+    _stop(umu_update_process)
+    return latest
 
-    return versions
 
+def _print_latest_umu_proton(latest: ProtonUpdate | None):
+    if latest is None:
+        print("Could not fetch latest UMU-Proton.")
+    else:
+        print(f"Latest UMU-Proton: {latest.name}.")
+
+
+def update_proton_versions() -> ProtonUpdate | None:
+    print("Updating umu Proton.")
+    latest: ProtonUpdate | None = fetch_latest_umu_proton()
+    _print_latest_umu_proton(latest)
+
+    return latest
 
-def get_latest_umu_proton() -> Path | None:
-    umu_proton_versions: list[Path] = [
-        config.UMU_PROTON_PATH / proton_ver
-        for proton_ver in config.UMU_PROTON_PATH.iterdir()
-        if "UMU" in proton_ver.name and (config.UMU_PROTON_PATH / proton_ver).is_dir()
-    ]
 
-    if len(umu_proton_versions) == 0:
+def start_update():
+    """Starts updating umu Proton in the background, see wait_for_update."""
+    global _update, _update_process
+
+    if _update is not None:
+        return
+
+    _update = Future()
+    try:
+        _update_process = _spawn_update()
+
+    except OSError as e:
+        _update.set_exception(e)
+        return
+
+    def run(update: Future, umu_update_process: subprocess.Popen):
+        try:
+            update.set_result(_read_update(umu_update_process))
+        except Exception as e:
+            update.set_exception(e)
+
+    # A daemon thread so a stuck umu-run cannot keep the program from exiting.
+    threading.Thread(target=run, args=(_update, _update_process), daemon=True).start()
+
+
+@timed("proton.wait_for_update")
+def wait_for_update(timeout: float = UPDATE_TIMEOUT) -> ProtonUpdate | None:
+    """Waits for an update started by start_update, if any.
+
+    Prints nothing while the update runs, so it doesn't draw over prompts.
+    """
+    global _update, _update_process
+
+    if _update is None:
         return None
 
-    umu_proton_versions = sorted(
-        umu_proton_versions, key=_natural_sort_proton_ver_key, reverse=True
-    )
+    latest: ProtonUpdate | None = None
+    try:
+        latest = _update.result(timeout)
+        _print_latest_umu_proton(latest)
+
+    except TimeoutError:
+        print("umu Proton is still updating, using installed versions.")
+        # Otherwise umu-run would be left running on its own.
+        _stop(_update_process)
+
+    except OSError:
+        print("Could not fetch latest UMU-Proton.")
+
+    _update = None
+    _update_process = None
+    return latest
+
+
+def _inventory_path() -> Path:
+    return config.CACHE_DIR / "proton_versions.json"
+
+
+def _load_inventory() -> dict[str, dict[str, Any]]:
+    global _inventory
+
+    if _inventory is None:
+        try:
+            with open(_inventory_path(), "rt") as inventory_file:
+                _inventory = json.load(inventory_file)
+
+        except (FileNotFoundError, json.JSONDecodeError):
+            _inventory = {}
+
+    return _inventory
+
+
+def _dump_inventory():
+    config.CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    with atomic_open(_inventory_path(), "wt") as inventory_file:
+        json.dump(_inventory, inventory_file)
+
+
+@timed("proton.scan")
+def _scan(proton_dir: Path) -> dict[str, Any]:
+    # scandir reports entry types from the directory listing itself, so only
+    # symlinks cost an extra stat.
+    with os.scandir(proton_dir) as entries:
+        versions: list[Path] = sorted(
+            [Path(entry.path) for entry in entries if entry.is_dir()],
+            key=_natural_sort_proton_ver_key,
+            reverse=True,
+        )
+
+    return {
+        "versions": [version.name for version in versions],
+        "latest_umu": next(
+            (version.name for version in versions if "UMU" in version.name), None
+        ),
+    }
+
+
+def _get_entry(
+    proton_dir: Path, inventory: dict[str, dict[str, Any]]
+) -> tuple[dict[str, Any], bool]:
+    """Returns the directory's listing and whether it had to be rescanned."""
+    try:
+        mtime: int = proton_dir.stat().st_mtime_ns
+        entry = inventory.get(str(proton_dir))
+        if entry is not None and entry["mtime"] == mtime:
+            return entry, False
+
+        entry = _scan(proton_dir)
+
+    # Missing or unreadable directories have no versions.
+    except OSError:
+        return {"versions": [], "latest_umu": None, "mtime": None}, False
+
+    entry["mtime"] = mtime if time.time_ns() - mtime > RACY_WINDOW else None
+    return entry, True
+
+
+def _iter_inventory(
+    proton_dirs: Iterable[Path],
+) -> Iterator[tuple[Path, dict[str, Any]]]:
+    """Yields each directory's listing as soon as it is read, in completion order."""
+    inventory = _load_inventory()
+    changed: bool = False
+
+    try:
+        with ThreadPoolExecutor() as executor:
+            futures = {
+                executor.submit(_get_entry, proton_dir, inventory): proton_dir
+                for proton_dir in proton_dirs
+            }
+            for future in as_completed(futures):
+                entry, rescanned = future.result()
+                if rescanned:
+                    inventory[str(futures[future])] = entry
+                    changed = True
+
+                yield futures[future], entry
+
+    finally:
+        if changed:
+            _dump_inventory()
+
+
+def _get_inventory(proton_dirs: Iterable[Path]) -> dict[Path, dict[str, Any]]:
+    proton_dirs = tuple(proton_dirs)
+    entries = dict(_iter_inventory(proton_dirs))
+    return {proton_dir: entries[proton_dir] for proton_dir in proton_dirs}
+
+
+def iter_proton_versions() -> Iterator[tuple[Path, list[Path]]]:
+    """Yields the versions of each Proton directory as soon as it is read."""
+    for proton_dir, entry in _iter_inventory(config.PROTON_PATHS):
+        if len(entry["versions"]) > 0:
+            yield proton_dir, [proton_dir / version for version in entry["versions"]]
+
+
+@timed("proton.collect_proton_versions")
+def collect_proton_versions(sort: bool = False) -> dict[Path, Iterable[Path]]:
+    # Cached listings are always sorted.
+    versions: dict[Path, Iterable[Path]] = dict(iter_proton_versions())
+    return {
+        proton_dir: versions[proton_dir]
+        for proton_dir in config.PROTON_PATHS
+        if proton_dir in versions
+    }
+
+
+def get_latest_umu_proton() -> Path | None:
+    entry = _get_inventory([config.UMU_PROTON_PATH])[config.UMU_PROTON_PATH]
+    if entry["latest_umu"] is None:
+        return None
+
+    return config.UMU_PROTON_PATH / entry["latest_umu"]
+
 
-    return umu_proton_versions[0]
+def _reset():
+    global _inventory, _update, _update_process
+    _inventory = None
+    _update = None
+    _update_process = None
@@ -0,0 +1,126 @@
+import os
+import tomllib
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any
+
+import umu_commander.configuration as config
+from umu_commander import database as db
+from umu_commander import umu_config
+
+# Threads listing directories and reading configs.
+SCAN_WORKERS: int = 16
+
+
+def _list_dir(directory: Path, any_toml: bool) -> tuple[list[Path], list[Path]]:
+    """Returns the subdirectories and candidate configs in directory."""
+    subdirs: list[Path] = []
+    candidates: list[Path] = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(Path(entry.path))
+
+                elif entry.name == str(config.DEFAULT_UMU_CONFIG_NAME) or (
+                    any_toml and entry.name.endswith(".toml")
+                ):
+                    candidates.append(Path(entry.path))
+
+    except OSError:
+        pass
+
+    return subdirs, candidates
+
+
+def _read_config(umu_config_path: Path) -> tuple[Path, Path, bool] | None:
+    """Returns the config, its Proton version and whether its paths were repaired.
+
+    Returns None for TOML files without a umu table.
+    """
+    with open(umu_config_path, "rb") as toml_file:
+        toml_conf: dict[str, Any] = tomllib.load(toml_file)
+
+    if not isinstance(toml_conf.get("umu"), dict) or "proton" not in toml_conf["umu"]:
+        return None
+
+    repaired: bool = umu_config.repair_paths(umu_config_path, toml_conf)
+    if repaired:
+        umu_config.write(umu_config_path, toml_conf)
+
+    proton_ver = Path(toml_conf["umu"]["proton"]).expanduser()
+    return umu_config_path, proton_ver, repaired
+
+
+def find_configs(
+    roots: Iterable[Path], *, any_toml: bool = False
+) -> Iterator[tuple[Path, Path, bool] | tuple[Path, Exception]]:
+    """Yields every umu config under roots, see _read_config, or the error it
+    could not be read with.
+
+    Directories are listed and configs read on SCAN_WORKERS threads. Only a few
+    listings and reads are queued at a time, unvisited directories and unread
+    configs wait in lists.
+    """
+    pending_dirs: list[Path] = [root.absolute() for root in roots]
+    pending_configs: list[Path] = []
+    running: dict[Future, Path | None] = {}
+
+    with ThreadPoolExecutor(SCAN_WORKERS) as executor:
+        while len(pending_dirs) > 0 or len(pending_configs) > 0 or len(running) > 0:
+            while len(running) < SCAN_WORKERS * 2:
+                # Configs first, so found ones do not pile up.
+                if len(pending_configs) > 0:
+                    candidate = pending_configs.pop()
+                    running[executor.submit(_read_config, candidate)] = candidate
+
+                elif len(pending_dirs) > 0:
+                    future = executor.submit(_list_dir, pending_dirs.pop(), any_toml)
+                    running[future] = None
+
+                else:
+                    break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                candidate: Path | None = running.pop(future)
+
+                # Listing results
+                if candidate is None:
+                    subdirs, candidates = future.result()
+                    pending_dirs.extend(subdirs)
+                    pending_configs.extend(candidates)
+
+                # Config results
+                else:
+                    try:
+                        if (result := future.result()) is not None:
+                            yield result
+
+                    except (OSError, tomllib.TOMLDecodeError, KeyError, TypeError) as e:
+                        yield candidate, e
+
+
+def scan(roots: list[Path] = None, *, any_toml: bool = False, quiet: bool = False):
+    if roots is None or len(roots) == 0:
+        roots = [Path.cwd()]
+
+    tracked: int = 0
+    repaired: int = 0
+    for result in find_configs(roots, any_toml=any_toml):
+        if isinstance(result[1], Exception):
+            if not quiet:
+                print(f"Could not read {result[0]}: {result[1]}")
+            continue
+
+        umu_config_path, proton_ver, was_repaired = result
+        db.add_user(proton_ver.parent, proton_ver, umu_config_path)
+        tracked += 1
+        repaired += was_repaired
+
+        if not quiet:
+            print(f"Tracked {umu_config_path} with {proton_ver.name}.")
+
+    if not quiet:
+        print(f"Tracked {tracked} configs, repaired paths in {repaired}.")
@@ -0,0 +1,244 @@
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import umu_commander.configuration as config
+
+if TYPE_CHECKING:
+    import sqlite3
+
+# configs is indexed on path for reverse lookups, the unique constraint on
+# (version_id, path) doubles as the per version index.
+_SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS proton_dirs (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS proton_versions (
+    id INTEGER PRIMARY KEY,
+    dir_id INTEGER NOT NULL REFERENCES proton_dirs (id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    UNIQUE (dir_id, name)
+);
+CREATE TABLE IF NOT EXISTS configs (
+    version_id INTEGER NOT NULL REFERENCES proton_versions (id) ON DELETE CASCADE,
+    path TEXT NOT NULL,
+    UNIQUE (version_id, path)
+);
+CREATE INDEX IF NOT EXISTS configs_path ON configs (path);
+"""
+
+_conn: "sqlite3.Connection | None" = None
+
+
+def _version_id(
+    proton_dir: Path, proton_ver: Path, *, create: bool = False
+) -> int | None:
+    if create:
+        _conn.execute(
+            "INSERT OR IGNORE INTO proton_dirs (path) VALUES (?)", (str(proton_dir),)
+        )
+        _conn.execute(
+            "INSERT OR IGNORE INTO proton_versions (dir_id, name) "
+            "SELECT id, ? FROM proton_dirs WHERE path = ?",
+            (proton_ver.name, str(proton_dir)),
+        )
+
+    row = _conn.execute(
+        "SELECT proton_versions.id FROM proton_versions "
+        "JOIN proton_dirs ON proton_dirs.id = proton_versions.dir_id "
+        "WHERE proton_dirs.path = ? AND proton_versions.name = ?",
+        (str(proton_dir), proton_ver.name),
+    ).fetchone()
+
+    return None if row is None else row[0]
+
+
+def _apply(record: dict[str, str]):
+    proton_dir = Path(record["dir"])
+    proton_ver = proton_dir / record["ver"]
+
+    match record["op"]:
+        case "add":
+            add_user(proton_dir, proton_ver, Path(record["user"]))
+
+        case "remove":
+            remove_user(proton_dir, proton_ver, Path(record["user"]))
+
+        case "delete":
+            remove_version(proton_dir, proton_ver)
+
+
+def import_json(snapshot_path: Path):
+    """Copies a JSON tracking DB and its journal into the SQLite DB."""
+    with open(snapshot_path, "rt") as db_file:
+        for proton_dir, proton_vers in json.load(db_file).items():
+            proton_dir = Path(proton_dir)
+            for proton_ver, proton_users in proton_vers.items():
+                proton_ver = proton_dir / proton_ver
+                _version_id(proton_dir, proton_ver, create=True)
+                for user in proton_users:
+                    add_user(proton_dir, proton_ver, Path(user))
+
+    try:
+        with open(str(snapshot_path) + ".journal", "rt") as journal_file:
+            for line in journal_file:
+                try:
+                    _apply(json.loads(line))
+                except json.JSONDecodeError:
+                    break
+
+    except FileNotFoundError:
+        pass
+
+
+def load(*, migrate: bool = True):
+    global _conn
+
+    # Only imported for SQLite DBs, the default JSON DB does not need it.
+    import sqlite3
+
+    if not config.DB_DIR.exists():
+        config.DB_DIR.mkdir()
+
+    db_path: Path = config.DB_DIR / config.DB_NAME
+    is_new: bool = not db_path.exists()
+
+    _conn = sqlite3.connect(db_path)
+    _conn.execute("PRAGMA foreign_keys = ON")
+    _conn.executescript(_SCHEMA)
+
+    json_path: Path = db_path.with_suffix(".json")
+    if migrate and is_new and json_path.exists():
+        import_json(json_path)
+        _conn.commit()
+
+
+def dirty() -> bool:
+    return _conn is not None and _conn.in_transaction
+
+
+def dump():
+    if dirty():
+        _conn.commit()
+
+
+def compact():
+    if _conn is None:
+        load()
+
+    dump()
+    _conn.execute("VACUUM")
+
+
+def get(
+    proton_dir: Path = None, proton_ver: Path = None
+) -> (
+    dict[Path, dict[Path, dict[Path, None]]]
+    | dict[Path, dict[Path, None]]
+    | dict[Path, None]
+):
+    if _conn is None:
+        load()
+
+    query: str = (
+        "SELECT proton_dirs.path, proton_versions.name, configs.path "
+        "FROM proton_versions "
+        "JOIN proton_dirs ON proton_dirs.id = proton_versions.dir_id "
+        "LEFT JOIN configs ON configs.version_id = proton_versions.id"
+    )
+    params: tuple[str, ...] = ()
+    if proton_dir is not None:
+        query += " WHERE proton_dirs.path = ?"
+        params = (str(proton_dir),)
+        if proton_ver is not None:
+            query += " AND proton_versions.name = ?"
+            params = (str(proton_dir), proton_ver.name)
+    query += " ORDER BY proton_versions.id, configs.rowid"
+
+    db: dict[Path, dict[Path, dict[Path, None]]] = {}
+    for dir_path, ver_name, user in _conn.execute(query, params):
+        dir_path = Path(dir_path)
+        version_users = db.setdefault(dir_path, {}).setdefault(dir_path / ver_name, {})
+        if user is not None:
+            version_users[Path(user)] = None
+
+    if proton_dir is None:
+        return db
+
+    if proton_ver is None:
+        return db.get(proton_dir, {})
+
+    return db.get(proton_dir, {}).get(proton_ver, {})
+
+
+def count_users(proton_dir: Path, proton_ver: Path) -> int | None:
+    if _conn is None:
+        load()
+
+    version_id = _version_id(proton_dir, proton_ver)
+    if version_id is None:
+        return None
+
+    return _conn.execute(
+        "SELECT COUNT(*) FROM configs WHERE version_id = ?", (version_id,)
+    ).fetchone()[0]
+
+
+def find_user(user: Path) -> list[Path]:
+    if _conn is None:
+        load()
+
+    return [
+        Path(dir_path) / ver_name
+        for dir_path, ver_name in _conn.execute(
+            "SELECT proton_dirs.path, proton_versions.name FROM configs "
+            "JOIN proton_versions ON proton_versions.id = configs.version_id "
+            "JOIN proton_dirs ON proton_dirs.id = proton_versions.dir_id "
+            "WHERE configs.path = ?",
+            (str(user),),
+        )
+    ]
+
+
+def add_user(proton_dir: Path, proton_ver: Path, user: Path):
+    if _conn is None:
+        load()
+
+    # A config is tracked by a single version, tracking it again moves it.
+    version_id = _version_id(proton_dir, proton_ver, create=True)
+    _conn.execute(
+        "DELETE FROM configs WHERE path = ? AND version_id != ?",
+        (str(user), version_id),
+    )
+    _conn.execute(
+        "INSERT OR IGNORE INTO configs (version_id, path) VALUES (?, ?)",
+        (version_id, str(user)),
+    )
+
+
+def remove_user(proton_dir: Path, proton_ver: Path, user: Path):
+    if _conn is None:
+        load()
+
+    _conn.execute(
+        "DELETE FROM configs WHERE version_id = ? AND path = ?",
+        (_version_id(proton_dir, proton_ver), str(user)),
+    )
+
+
+def remove_version(proton_dir: Path, proton_ver: Path):
+    if _conn is None:
+        load()
+
+    version_id = _version_id(proton_dir, proton_ver)
+    if version_id is not None:
+        _conn.execute("DELETE FROM proton_versions WHERE id = ?", (version_id,))
+
+
+def _reset():
+    global _conn
+
+    if _conn is not None:
+        _conn.close()
+    _conn = None
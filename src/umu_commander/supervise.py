@@ -0,0 +1,261 @@
+import asyncio
+import glob
+import os
+import signal
+import threading
+import time
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from umu_commander import prewarm, umu_config
+from umu_commander.configuration import DEFAULT_UMU_CONFIG_NAME
+
+# Longest output line relayed whole, the rest of longer lines is dropped.
+LINE_LIMIT: int = 1024**2
+# Seconds output is still relayed once a launch exits, processes it left behind
+# can hold its output open.
+OUTPUT_GRACE: float = 1.0
+# Seconds a launch gets to exit after SIGTERM before it is killed.
+TERMINATE_TIMEOUT: float = 10.0
+
+
+class Launch(NamedTuple):
+    umu_config: Path
+    # None if the launch was interrupted or never started.
+    code: int | None
+    duration: float
+
+
+def expand(targets: list[Path]) -> list[Path]:
+    """Returns the configs the targets refer to, in order and without repeats.
+
+    Directories stand for the default config inside them, and targets are
+    expanded as globs for callers that do not expand them.
+    """
+    configs: dict[Path, None] = {}
+    for target in targets:
+        paths: list[Path] = [target]
+        if any(char in str(target) for char in "*?["):
+            paths = [Path(path) for path in sorted(glob.glob(str(target)))]
+
+        for path in paths:
+            if path.is_dir():
+                path /= DEFAULT_UMU_CONFIG_NAME
+            configs[path.absolute()] = None
+
+    return [*configs]
+
+
+def labels(configs: list[Path]) -> dict[Path, str]:
+    """Names each config after its directory, or its path where names collide."""
+    names: dict[str, int] = {}
+    for path in configs:
+        names[path.parent.name] = names.get(path.parent.name, 0) + 1
+
+    return {
+        path: path.parent.name if names[path.parent.name] == 1 else str(path)
+        for path in configs
+    }
+
+
+async def _relay(stream: asyncio.StreamReader, label: str):
+    while True:
+        try:
+            line: bytes = await stream.readline()
+
+        except ValueError:
+            # The line exceeded LINE_LIMIT.
+            continue
+
+        if line == b"":
+            return
+
+        print(f"[{label}] {line.decode(errors='replace').rstrip()}", flush=True)
+
+
+async def _terminate(process: asyncio.subprocess.Process):
+    # Launches run in their own session, so the game and WINE go down with them.
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        await asyncio.wait_for(process.wait(), TERMINATE_TIMEOUT)
+
+    except ProcessLookupError:
+        pass
+
+    except TimeoutError:
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+        await process.wait()
+
+
+async def _launch(
+    path: Path,
+    label: str,
+    limit: asyncio.Semaphore,
+    launches: dict[Path, Launch],
+    prewarmed: dict[Path, int] | None,
+    prefixes: bool,
+    stops: list[threading.Event],
+):
+    async with limit:
+        try:
+            process = await _start(path, label, prewarmed, prefixes, stops)
+
+        except FileNotFoundError as e:
+            if e.filename == str(path):
+                print(f"[{label}] Specified umu config does not exist.")
+            else:
+                print(f"[{label}] {e.strerror}: {e.filename}")
+            return
+
+        except Exception as e:
+            # A broken config must not take the other launches down with it.
+            print(f"[{label}] {type(e).__name__}: {e}")
+            return
+
+        started: float = time.monotonic()
+        relay = asyncio.create_task(_relay(process.stdout, label))
+        code: int | None = None
+        try:
+            code = await process.wait()
+            try:
+                await asyncio.wait_for(relay, OUTPUT_GRACE)
+            except TimeoutError:
+                pass
+
+        except asyncio.CancelledError:
+            relay.cancel()
+            await _terminate(process)
+            raise
+
+        finally:
+            launches[path] = Launch(path, code, time.monotonic() - started)
+
+
+async def _start(
+    path: Path,
+    label: str,
+    prewarmed: dict[Path, int] | None,
+    prefixes: bool,
+    stops: list[threading.Event],
+) -> asyncio.subprocess.Process:
+    plan: dict[str, Any] = umu_config.load_plan(path)
+    for key, stale in umu_config.stale_paths(plan).items():
+        print(
+            f"[{label}] The {key} path {stale} no longer exists, see umu-commander fix."
+        )
+
+    umu_config.create_prefix(plan)
+
+    # Each Proton version is prewarmed once, along with each prefix if asked.
+    if prewarmed is not None:
+        proton_ver: Path | None = umu_config.prewarm_target(plan)
+        if proton_ver is not None and (proton_ver not in prewarmed or prefixes):
+            stops.append(
+                prewarm.start(proton_ver, Path(plan["prefix"]) if prefixes else None)
+            )
+            prewarmed.setdefault(proton_ver, time.time_ns())
+
+    return await asyncio.create_subprocess_exec(
+        *plan["argv"],
+        env={**os.environ, **plan["env"]},
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+        start_new_session=True,
+        limit=LINE_LIMIT,
+    )
+
+
+async def supervise(
+    configs: list[Path], *, jobs: int = None, prewarm_level: str = None
+) -> list[Launch]:
+    """Launches the configs, at most jobs at a time, relaying their output with
+    each line prefixed by the config's label. Returns every config's launch.
+
+    Cancelling, or SIGINT and SIGTERM, terminates the running launches and
+    returns the launches so far.
+    """
+    if jobs is not None and jobs < 1:
+        raise ValueError(f"jobs must be at least 1, not {jobs}")
+
+    task: asyncio.Task = asyncio.current_task()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, task.cancel)
+
+    launches: dict[Path, Launch] = {path: Launch(path, None, 0.0) for path in configs}
+    prewarmed: dict[Path, int] | None = {} if prewarm_level is not None else None
+    stops: list[threading.Event] = []
+    limit = asyncio.Semaphore(jobs if jobs is not None else len(configs))
+    tasks: list[asyncio.Task] = [
+        asyncio.create_task(
+            _launch(
+                path,
+                label,
+                limit,
+                launches,
+                prewarmed,
+                prewarm_level == "all",
+                stops,
+            )
+        )
+        for path, label in labels(configs).items()
+    ]
+
+    try:
+        await asyncio.gather(*tasks)
+
+    except asyncio.CancelledError:
+        # gather already cancelled the launches, they are left to terminate.
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    finally:
+        asyncio.get_running_loop().remove_signal_handler(signal.SIGTERM)
+
+    for stop in stops:
+        stop.set()
+
+    if prewarmed is not None:
+        for proton_ver, launched in prewarmed.items():
+            await asyncio.to_thread(prewarm.learn, proton_ver, launched)
+
+    return [*launches.values()]
+
+
+def run_many(
+    targets: list[Path],
+    *,
+    jobs: int = None,
+    prewarm_level: str = None,
+    quiet: bool = False,
+) -> int:
+    """Launches the configs the targets refer to concurrently, see supervise.
+    Returns how many did not exit successfully.
+    """
+    configs: list[Path] = expand(targets)
+    if len(configs) == 0:
+        print("No umu configs match the targets.")
+        return 0
+
+    launches: list[Launch] = asyncio.run(
+        supervise(configs, jobs=jobs, prewarm_level=prewarm_level)
+    )
+    failed: int = sum(launch.code != 0 for launch in launches)
+
+    if not quiet:
+        print(f"Launched {len(launches)} configs, {failed} did not exit successfully.")
+        config_labels: dict[Path, str] = labels(configs)
+        for launch in launches:
+            label: str = config_labels[launch.umu_config]
+            if launch.code is not None:
+                print(
+                    f"{label}: exited with {launch.code} after {launch.duration:.1f}s"
+                )
+            elif launch.duration > 0:
+                print(f"{label}: interrupted after {launch.duration:.1f}s")
+            else:
+                print(f"{label}: not launched")
+
+    return failed
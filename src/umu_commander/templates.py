@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+import umu_commander.configuration as config
+from umu_commander.files import atomic_open, clone_file, tree_size
+
+# Files copied at once when cloning a template.
+CLONE_WORKERS: int = 8
+
+
+def template_path(proton_ver: Path) -> Path:
+    # Versions of the same name can live in several PROTON_PATHS.
+    digest: str = hashlib.sha1(str(proton_ver).encode()).hexdigest()[:8]
+    return config.PREFIX_TEMPLATE_DIR / f"{proton_ver.name}-{digest}"
+
+
+def _stamp_path(proton_ver: Path) -> Path:
+    # Kept next to the template so it is not cloned along with it.
+    template: Path = template_path(proton_ver)
+    return template.with_name(template.name + ".json")
+
+
+def _proton_id(proton_ver: Path) -> list[Any]:
+    """Identifies the installed build, Proton updated in place gets a new one."""
+    proton_stat = (
+        proton_ver / "proton" if (proton_ver / "proton").exists() else proton_ver
+    ).stat()
+    return [str(proton_ver), proton_stat.st_ino, proton_stat.st_mtime_ns]
+
+
+def is_fresh(proton_ver: Path) -> bool:
+    """Returns whether the template exists and was built by the installed Proton build."""
+    try:
+        with open(_stamp_path(proton_ver), "rt") as stamp_file:
+            return template_path(proton_ver).is_dir() and json.load(
+                stamp_file
+            ) == _proton_id(proton_ver)
+
+    except (FileNotFoundError, json.JSONDecodeError):
+        return False
+
+
+def build(proton_ver: Path) -> Path | None:
+    """Initialises a prefix with the Proton version to clone new prefixes from,
+    returns None if umu-run failed.
+    """
+    template: Path = template_path(proton_ver)
+    building: Path = template.with_name(template.name + ".building")
+    shutil.rmtree(building, ignore_errors=True)
+    building.parent.mkdir(parents=True, exist_ok=True)
+
+    try:
+        subprocess.run(
+            ["umu-run", "wineboot", "-u"],
+            env={
+                **os.environ,
+                "WINEPREFIX": str(building),
+                "PROTONPATH": str(proton_ver),
+                "GAMEID": "umu-default",
+            },
+            capture_output=True,
+            check=True,
+        )
+
+    except (OSError, subprocess.CalledProcessError):
+        shutil.rmtree(building, ignore_errors=True)
+        return None
+
+    remove(proton_ver)
+    building.rename(template)
+    with atomic_open(_stamp_path(proton_ver), "wt") as stamp_file:
+        json.dump(_proton_id(proton_ver), stamp_file)
+
+    return template
+
+
+def get(proton_ver: Path, *, quiet: bool = False) -> Path | None:
+    """Returns the Proton version's template, building it first if it is missing
+    or was built by another build of the version.
+    """
+    if is_fresh(proton_ver):
+        return template_path(proton_ver)
+
+    if not quiet:
+        print(
+            f"Preparing a template prefix for {proton_ver.name}, this only happens once per version."
+        )
+
+    return build(proton_ver)
+
+
+def clone(template: Path, prefix: Path) -> int:
+    """Copies template to prefix, file contents as reflinks where the filesystem
+    supports them. Symlinks are copied as they are. Returns the number of files.
+
+    Hardlinks are never used, WINE modifies prefix files in place. A prefix that
+    could not be copied completely is removed again.
+    """
+    prefix.mkdir(parents=True)
+    try:
+        return _copy_tree(template, prefix)
+
+    except BaseException:
+        shutil.rmtree(prefix, ignore_errors=True)
+        raise
+
+
+def _copy_tree(template: Path, prefix: Path) -> int:
+    files: list[tuple[str, str]] = []
+    pending: list[tuple[str, str]] = [(str(template), str(prefix))]
+    while len(pending) > 0:
+        source_dir, target_dir = pending.pop()
+        with os.scandir(source_dir) as entries:
+            for entry in entries:
+                target: str = os.path.join(target_dir, entry.name)
+                if entry.is_symlink():
+                    os.symlink(os.readlink(entry.path), target)
+
+                elif entry.is_dir():
+                    os.mkdir(target)
+                    shutil.copymode(entry.path, target)
+                    pending.append((entry.path, target))
+
+                else:
+                    files.append((entry.path, target))
+
+    # A failed reflink is not retried for the remaining files.
+    try_reflink: bool = True
+    if len(files) > 0:
+        try_reflink = clone_file(*files[0])
+
+    with ThreadPoolExecutor(CLONE_WORKERS) as executor:
+        for _ in executor.map(
+            lambda file: clone_file(*file, try_reflink=try_reflink), files[1:]
+        ):
+            pass
+
+    return len(files)
+
+
+def remove(proton_ver: Path) -> int:
+    """Removes the Proton version's template, returns the bytes freed."""
+    template: Path = template_path(proton_ver)
+    size: int = tree_size(template)
+    shutil.rmtree(template, ignore_errors=True)
+    _stamp_path(proton_ver).unlink(missing_ok=True)
+    return size
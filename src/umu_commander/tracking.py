@@ -1,21 +1,34 @@
 import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
-from InquirerPy import inquirer
-
 import umu_commander.database as db
+from umu_commander import configuration, templates
 from umu_commander.configuration import DEFAULT_UMU_CONFIG_NAME
+from umu_commander.files import tree_size
+from umu_commander.profiling import timed
 from umu_commander.proton import (
     collect_proton_versions,
     get_latest_umu_proton,
-    update_proton_versions,
+    start_update,
+    wait_for_update,
 )
 from umu_commander.util import (
     build_choices,
+    format_size,
 )
 
+# Proton versions removed at once by delete.
+DELETE_WORKERS: int = 4
+# Configs checked at once by untrack_unlinked, they often live on slow drives.
+LIVENESS_WORKERS: int = 16
+
 
+@timed("tracking.select_config")
 def select_config() -> str:
+    from InquirerPy import inquirer
+
     files = [file for file in Path.cwd().iterdir() if file.is_file()]
     choices = build_choices(files, None)
     return inquirer.select("Select umu-commander config:", choices).execute()
@@ -27,10 +40,8 @@ def untrack(target_dir: Path = None, *, quiet: bool = False):
 
     target_dir = target_dir.absolute()
 
-    for proton_dir in db.get().keys():
-        for proton_ver in db.get(proton_dir):
-            if target_dir in db.get(proton_dir, proton_ver):
-                db.get(proton_dir, proton_ver).remove(target_dir)
+    for proton_ver in db.find_user(target_dir):
+        db.remove_user(proton_ver.parent, proton_ver, target_dir)
 
     if not quiet:
         print("Config removed from all tracking lists.")
@@ -44,6 +55,11 @@ def track(
     update_versions: bool = True,
     quiet: bool = False,
 ):
+    # The update runs while the config is being selected, it is started
+    # even with a Proton version given when asked for.
+    if update_versions:
+        start_update()
+
     if config is None:
         if interactive:
             config = select_config()
@@ -51,10 +67,11 @@ def track(
         else:
             config = Path.cwd() / DEFAULT_UMU_CONFIG_NAME
 
-    if update_versions:
-        update_proton_versions()
+    wait_for_update()
 
     if proton_ver is None:
+        from InquirerPy import inquirer
+
         proton_dirs = collect_proton_versions(sort=True)
         choices = build_choices(None, proton_dirs)
         proton_ver: Path = inquirer.select(
@@ -64,8 +81,8 @@ def track(
     proton_ver = proton_ver.absolute()
     config = config.absolute()
 
-    untrack(config, quiet=True)
-    db.get(proton_ver.parent, proton_ver).append(config)
+    # Also removes the config from any other tracking list.
+    db.add_user(proton_ver.parent, proton_ver, config)
 
     if not quiet:
         print(
@@ -75,6 +92,8 @@ def track(
 
 def users(proton_ver: Path = None):
     if proton_ver is None:
+        from InquirerPy import inquirer
+
         proton_dirs = collect_proton_versions(sort=True)
         choices = build_choices(None, proton_dirs, count_elements=True)
         proton_ver: Path = inquirer.select(
@@ -83,12 +102,12 @@ def users(proton_ver: Path = None):
 
     proton_ver = proton_ver.absolute()
 
-    if proton_ver.parent in db.get() and proton_ver in db.get(proton_ver.parent):
-        version_users: list[Path] = db.get(proton_ver.parent, proton_ver)
-        if len(version_users) > 0:
+    user_count: int | None = db.count_users(proton_ver.parent, proton_ver)
+    if user_count is not None:
+        if user_count > 0:
             print(
                 f"Directories tracked by {proton_ver.name} of {proton_ver.parent}:",
-                *version_users,
+                *db.get(proton_ver.parent, proton_ver),
                 sep="\n\t",
             )
 
@@ -99,30 +118,150 @@ def users(proton_ver: Path = None):
         print("This version hasn't been used by umu before.")
 
 
-def delete():
-    for proton_dir in db.get().keys():
-        for proton_ver, version_users in db.get(proton_dir).copy().items():
-            if proton_ver == get_latest_umu_proton():
+def _scan_deletable() -> tuple[dict[Path, list[Path]], list[tuple[Path, Path]]]:
+    latest_umu_proton: Path | None = get_latest_umu_proton()
+
+    deletable: dict[Path, list[Path]] = {}
+    missing: list[tuple[Path, Path]] = []
+    for proton_dir, proton_vers in db.get().items():
+        for proton_ver, version_users in proton_vers.items():
+            if proton_ver == latest_umu_proton:
+                continue
+
+            if not proton_ver.exists():
+                missing.append((proton_dir, proton_ver))
+
+            elif len(version_users) == 0:
+                deletable.setdefault(proton_dir, []).append(proton_ver)
+
+    return deletable, missing
+
+
+@timed("tracking.find_deletable")
+def find_deletable() -> dict[Path, list[Path]]:
+    """Returns tracked Proton versions that track no configs, grouped by directory.
+
+    Versions that no longer exist are left out, the latest UMU-Proton is never
+    returned. The DB is not modified.
+    """
+    return _scan_deletable()[0]
+
+
+@timed("tracking.collect_deletable")
+def collect_deletable() -> dict[Path, list[Path]]:
+    """Returns tracked Proton versions that track no configs, grouped by directory.
+
+    Versions that no longer exist are untracked, the latest UMU-Proton is never
+    returned.
+    """
+    deletable, missing = _scan_deletable()
+    for proton_dir, proton_ver in missing:
+        db.remove_version(proton_dir, proton_ver)
+
+    return deletable
+
+
+def _remove_version(proton_ver: Path) -> int:
+    size: int = tree_size(proton_ver)
+    shutil.rmtree(proton_ver)
+    return size + templates.remove(proton_ver)
+
+
+@timed("tracking.remove_versions")
+def remove_versions(proton_vers: list[Path], *, quiet: bool = False) -> int:
+    """Deletes and untracks Proton versions concurrently, returns the bytes freed."""
+    reclaimed: int = 0
+    with ThreadPoolExecutor(DELETE_WORKERS) as executor:
+        futures = {
+            executor.submit(_remove_version, proton_ver): proton_ver
+            for proton_ver in proton_vers
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            proton_ver: Path = futures[future]
+            try:
+                size: int = future.result()
+
+            except OSError as e:
+                if not quiet:
+                    print(f"[{done}/{len(futures)}] Could not delete {proton_ver}: {e}")
                 continue
 
-            if not (proton_dir / proton_ver).exists():
-                del db.get(proton_dir)[proton_ver]
-
-            if len(version_users) == 0:
-                confirmed: bool = inquirer.confirm(
-                    f"Version {proton_ver.name} in {proton_dir} is tracking no directories, delete?"
-                ).execute()
-                if confirmed:
-                    try:
-                        shutil.rmtree(proton_dir / proton_ver)
-                    except FileNotFoundError:
-                        pass
-                    del db.get(proton_dir)[proton_ver]
-
-
-def untrack_unlinked():
-    for proton_dir in db.get().keys():
-        for proton_ver, version_users in db.get()[proton_dir].items():
-            for user in version_users:
-                if not user.exists():
-                    db.get(proton_dir, proton_ver).remove(user)
+            db.remove_version(proton_ver.parent, proton_ver)
+            reclaimed += size
+            if not quiet:
+                print(
+                    f"[{done}/{len(futures)}] Deleted {proton_ver.name} in {proton_ver.parent} ({format_size(size)})."
+                )
+
+    return reclaimed
+
+
+def delete(*, quiet: bool = False):
+    deletable: dict[Path, list[Path]] = collect_deletable()
+    if len(deletable) == 0:
+        if not quiet:
+            print("No Proton versions can be deleted.")
+        return
+
+    from InquirerPy import inquirer
+
+    choices = build_choices(None, deletable)
+    selected: list[Path] = inquirer.checkbox(
+        "Select Proton versions tracking no directories to delete:", choices
+    ).execute()
+    if len(selected) == 0:
+        return
+
+    reclaimed: int = remove_versions(selected, quiet=quiet)
+    if not quiet:
+        print(f"Reclaimed {format_size(reclaimed)}.")
+
+
+@timed("tracking.untrack_unlinked")
+def untrack_unlinked() -> int:
+    """Untracks configs that no longer exist, returns how many were untracked.
+
+    Configs are checked on LIVENESS_WORKERS threads, removals are applied
+    afterwards so the DB is not changed while it is being read.
+    """
+    candidates: list[tuple[Path, Path, Path]] = [
+        (proton_dir, proton_ver, user)
+        for proton_dir, proton_vers in db.get().items()
+        for proton_ver, version_users in proton_vers.items()
+        for user in version_users
+    ]
+    if len(candidates) == 0:
+        return 0
+
+    with ThreadPoolExecutor(min(LIVENESS_WORKERS, len(candidates))) as executor:
+        alive: list[bool] = list(
+            executor.map(lambda candidate: candidate[2].exists(), candidates)
+        )
+
+    unlinked = [candidate for candidate, exists in zip(candidates, alive) if not exists]
+    for proton_dir, proton_ver, user in unlinked:
+        db.remove_user(proton_dir, proton_ver, user)
+
+    return len(unlinked)
+
+
+def _maintenance_stamp() -> Path:
+    return configuration.DB_DIR / (str(configuration.DB_NAME) + ".maintenance")
+
+
+@timed("tracking.maintenance")
+def maintenance():
+    """Untracks unlinked configs if the last run was UNLINKED_SWEEP_INTERVAL hours ago."""
+    stamp: Path = _maintenance_stamp()
+    try:
+        interval: float = configuration.UNLINKED_SWEEP_INTERVAL * 3600
+        if time.time() - stamp.stat().st_mtime < interval:
+            return
+
+    except FileNotFoundError:
+        pass
+
+    untrack_unlinked()
+
+    if stamp.parent.exists():
+        stamp.touch()
@@ -1,44 +1,58 @@
+import hashlib
+import json
 import os
 import subprocess
+import threading
+import time
 import tomllib
 from collections.abc import Iterable
 from pathlib import Path
 from typing import Any
 
-import tomli_w
-from InquirerPy import inquirer
-
 import umu_commander.configuration as config
 from umu_commander import database as db
-from umu_commander import tracking
+from umu_commander import prewarm, templates, tracking
 from umu_commander.configuration import (
     DEFAULT_UMU_CONFIG_NAME,
     DLL_OVERRIDES_OPTIONS,
     LANG_OVERRIDES_OPTIONS,
 )
+from umu_commander.files import atomic_open
+from umu_commander.profiling import span, timed
 from umu_commander.proton import (
+    RACY_WINDOW,
     collect_proton_versions,
     get_latest_umu_proton,
-    update_proton_versions,
+    start_update,
+    wait_for_update,
 )
 from umu_commander.Types import Element
 from umu_commander.util import build_choices
 
 
+@timed("umu_config.select_prefix")
 def select_prefix() -> Path:
+    from InquirerPy import inquirer
+
     default = Element(str(Path.cwd() / "prefix"), "Current directory")
     choices = build_choices([default, *config.DEFAULT_PREFIX_DIR.iterdir()], None)
     return inquirer.select("Select wine prefix:", choices, default).execute()
 
 
+@timed("umu_config.select_proton")
 def select_proton() -> Path:
+    from InquirerPy import inquirer
+
     choices = build_choices(None, collect_proton_versions(sort=True))
     return inquirer.select(
         "Select Proton version:", choices, Path.cwd() / "prefix"
     ).execute()
 
 
+@timed("umu_config.select_dll_override")
 def select_dll_override() -> str:
+    from InquirerPy import inquirer
+
     choices = build_choices(DLL_OVERRIDES_OPTIONS, None)
     return "".join(
         [
@@ -50,27 +64,39 @@ def select_dll_override() -> str:
     )
 
 
+@timed("umu_config.select_lang")
 def select_lang() -> str:
+    from InquirerPy import inquirer
+
     default = Element("", "No override")
     choices = build_choices([default, *LANG_OVERRIDES_OPTIONS], None)
     return inquirer.select("Select locale:", choices, default).execute()
 
 
+@timed("umu_config.set_launch_args")
 def set_launch_args() -> list[str]:
+    from InquirerPy import inquirer
+
     options: str = inquirer.text(
         "Enter executable options, separated by space:"
     ).execute()
     return [opt.strip() for opt in options.split(" ") if opt.strip() != ""]
 
 
+@timed("umu_config.set_runners")
 def set_runners() -> list[str]:
+    from InquirerPy import inquirer
+
     options: str = inquirer.text(
         "Enter runners in order, separated by space:"
     ).execute()
     return [opt.strip() for opt in options.split(" ") if opt.strip() != ""]
 
 
+@timed("umu_config.select_exe")
 def select_exe() -> Path:
+    from InquirerPy import inquirer
+
     files = [file for file in Path.cwd().iterdir() if file.is_file()]
     choices = build_choices(files, None)
     return inquirer.select("Select game executable:", choices).execute()
@@ -86,12 +112,15 @@ def create(
     exe: Path = None,
     output: Path = None,
     *,
+    template: bool = False,
     interactive: bool = True,
     update_versions: bool = True,
     quiet: bool = False,
-):
+) -> Path | None:
+    # The update runs while the other prompts are answered, it is started
+    # even with a Proton version given when asked for.
     if update_versions:
-        update_proton_versions()
+        start_update()
 
     # Prefix selection
     if prefix is None:
@@ -101,14 +130,6 @@ def create(
         else:
             prefix = Path.cwd() / "prefix"
 
-    # Proton selection
-    if proton_ver is None:
-        if interactive:
-            proton_ver = select_proton()
-
-        else:
-            proton_ver = get_latest_umu_proton()
-
     # Select DLL overrides
     if dll_overrides is None and interactive:
         dll_overrides = select_dll_override()
@@ -129,6 +150,34 @@ def create(
     if exe is None:
         exe = select_exe()
 
+    # Proton selection
+    wait_for_update()
+    if proton_ver is None:
+        if interactive:
+            proton_ver = select_proton()
+
+        else:
+            proton_ver = get_latest_umu_proton()
+
+    # A clone of an initialised prefix skips WINE's first run setup.
+    if template and proton_ver is not None and not Path(prefix).exists():
+        proton_ver = Path(proton_ver).absolute()
+        if (template_prefix := templates.get(proton_ver, quiet=quiet)) is None:
+            if not quiet:
+                print(
+                    "Could not prepare a template prefix, it will be set up on first run."
+                )
+
+        else:
+            try:
+                templates.clone(template_prefix, Path(prefix))
+
+            except OSError:
+                if not quiet:
+                    print(
+                        "Could not copy the template prefix, it will be set up on first run."
+                    )
+
     params: dict[str, Any] = {
         "umu": {
             "prefix": str(prefix),
@@ -156,50 +205,195 @@ def create(
         output = Path.cwd() / DEFAULT_UMU_CONFIG_NAME
 
     try:
-        with open(output, "wb") as file:
-            tomli_w.dump(params, file)
+        write(output, params)
 
     except (ValueError, TypeError):
         if not quiet:
             print("Could not create configuration file.")
+        return None
 
     if not quiet:
         print(f"Configuration file {output.name} created in {output.parent}.")
         print(f"Use with umu-commander run.")
 
     tracking.track(proton_ver, output, update_versions=False, quiet=quiet)
+    return output
+
+
+def _plan_path(umu_config: Path) -> Path:
+    digest: str = hashlib.sha1(str(umu_config).encode()).hexdigest()
+    return config.CACHE_DIR / "launch_plans" / f"{digest}.json"
+
+
+@timed("umu_config.compile_plan")
+def compile_plan(umu_config: Path) -> dict[str, Any]:
+    """Returns what run needs to launch the config: argv, env changes and prefix.
+
+    The proton and exe paths are kept so stale ones can be reported.
+    """
+    with open(umu_config, "rb") as toml_file:
+        toml_conf: dict[str, Any] = tomllib.load(toml_file)
+
+    env: dict[str, str] = {
+        key: str(value) if isinstance(value, int | float) else value
+        for key, value in toml_conf.get("env", {}).items()
+    }
+    return {
+        "argv": [
+            *toml_conf["umu"].get("runners", []),
+            "umu-run",
+            "--config",
+            str(umu_config),
+        ],
+        "env": env,
+        "prefix": toml_conf["umu"]["prefix"],
+        "paths": {
+            key: toml_conf["umu"][key]
+            for key in ("proton", "exe")
+            if key in toml_conf["umu"]
+        },
+    }
+
+
+@timed("umu_config.load_plan")
+def load_plan(umu_config: Path) -> dict[str, Any]:
+    """Returns the cached launch plan of the config, compiling it again if the
+    config's mtime or size changed.
+    """
+    umu_config = umu_config.absolute()
+    config_stat = umu_config.stat()
+    plan_path: Path = _plan_path(umu_config)
+    try:
+        with open(plan_path, "rt") as plan_file:
+            plan: dict[str, Any] = json.load(plan_file)
 
+        if (plan["mtime"], plan["size"]) == (
+            config_stat.st_mtime_ns,
+            config_stat.st_size,
+        ):
+            return plan
 
-def run(umu_config: Path = None):
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        pass
+
+    plan = compile_plan(umu_config)
+    # Configs edited within the racy window could change again unnoticed.
+    plan["mtime"] = None
+    if time.time_ns() - config_stat.st_mtime_ns > RACY_WINDOW:
+        plan["mtime"] = config_stat.st_mtime_ns
+    plan["size"] = config_stat.st_size
+
+    try:
+        plan_path.parent.mkdir(parents=True, exist_ok=True)
+        with atomic_open(plan_path, "wt") as plan_file:
+            json.dump(plan, plan_file)
+
+    except OSError:
+        pass
+
+    return plan
+
+
+def stale_paths(plan: dict[str, Any]) -> dict[str, Path]:
+    """Returns the plan's absolute proton and exe paths that no longer exist."""
+    stale: dict[str, Path] = {}
+    for key, path in plan["paths"].items():
+        path = Path(path)
+        if path.is_absolute() and not path.exists():
+            stale[key] = path
+
+    return stale
+
+
+def create_prefix(plan: dict[str, Any]):
+    """Creates the plan's prefix directory if it is missing."""
+    prefix_path = Path(plan["prefix"])
+    if not prefix_path.exists():
+        prefix_path.mkdir()
+
+
+def prewarm_target(plan: dict[str, Any]) -> Path | None:
+    """Returns the plan's Proton version if it can be prewarmed, versions umu-run
+    resolves by name are left alone.
+    """
+    proton_ver = Path(plan["paths"].get("proton", ""))
+    if proton_ver.is_absolute() and proton_ver.is_dir():
+        return proton_ver
+
+    return None
+
+
+def run(umu_config: Path = None, prewarm_level: str = None):
+    """Launches the config, prewarm_level is one of prewarm.LEVELS to read the
+    Proton version ahead into the page cache while it starts.
+    """
     if umu_config is None:
         umu_config = Path.cwd() / DEFAULT_UMU_CONFIG_NAME
 
-    if not umu_config.exists():
+    try:
+        plan: dict[str, Any] = load_plan(umu_config)
+
+    except FileNotFoundError:
         print("Specified umu config does not exist.")
         return
 
-    with open(umu_config, "rb") as toml_file:
-        toml_conf = tomllib.load(toml_file)
+    for key, path in stale_paths(plan).items():
+        print(f"The {key} path {path} no longer exists, see umu-commander fix.")
 
-        prefix_path = Path(toml_conf["umu"]["prefix"])
-        if not prefix_path.exists():
-            prefix_path.mkdir()
-
-        for key, value in toml_conf.get("env", {}).items():
-            if isinstance(value, int) or isinstance(value, float):
-                toml_conf["env"][key] = str(value)
-
-        os.environ.update(toml_conf.get("env", {}))
-        subprocess.run(
-            args=[
-                *toml_conf["umu"].get("runners", []),
-                "umu-run",
-                "--config",
-                umu_config,
-            ],
-            env=os.environ,
+    try:
+        create_prefix(plan)
+
+    except OSError as e:
+        print(f"Could not create the prefix {plan['prefix']}: {e.strerror}.")
+        return
+
+    proton_ver: Path | None = None
+    if prewarm_level is not None:
+        proton_ver = prewarm_target(plan)
+
+    launched: int = time.time_ns()
+    stop_prewarm: threading.Event | None = None
+    if proton_ver is not None:
+        stop_prewarm = prewarm.start(
+            proton_ver, Path(plan["prefix"]) if prewarm_level == "all" else None
         )
 
+    # Launches that fail or are interrupted stop the prewarm but are not learnt.
+    try:
+        with span("umu_config.launch"):
+            subprocess.run(args=plan["argv"], env={**os.environ, **plan["env"]})
+
+    finally:
+        if stop_prewarm is not None:
+            stop_prewarm.set()
+
+    if proton_ver is not None:
+        with span("prewarm.learn"):
+            prewarm.learn(proton_ver, launched)
+
+
+def repair_paths(umu_config: Path, toml_conf: dict[str, Any]) -> bool:
+    """Points missing absolute prefix and exe paths next to the config.
+
+    Returns whether any path was changed.
+    """
+    base_dir = umu_config.parent
+    changed: bool = False
+    for key in ("prefix", "exe"):
+        path = Path(toml_conf["umu"][key])
+        if not path.exists() and path.is_absolute():
+            toml_conf["umu"][key] = str(base_dir / path.name)
+            changed = True
+
+    return changed
+
+
+def write(umu_config: Path, toml_conf: dict[str, Any]):
+    import tomli_w
+
+    with atomic_open(umu_config, "wb") as toml_file:
+        tomli_w.dump(toml_conf, toml_file)
+
 
 def fix(umu_config: Path = None):
     if umu_config is None:
@@ -212,16 +406,8 @@ def fix(umu_config: Path = None):
     with open(umu_config, "rb") as toml_file:
         toml_conf = tomllib.load(toml_file)
 
-    base_dir = umu_config.parent
     proton = Path(toml_conf["umu"]["proton"])
-    prefix = Path(toml_conf["umu"]["prefix"])
-    db.get(proton.parent, proton).append(umu_config)
-    if not prefix.exists() and prefix.is_absolute():
-        toml_conf["umu"]["prefix"] = str(base_dir / prefix.name)
+    db.add_user(proton.parent, proton, umu_config)
 
-    exe = Path(toml_conf["umu"]["exe"])
-    if not exe.exists() and exe.is_absolute():
-        toml_conf["umu"]["exe"] = str(base_dir / exe.name)
-
-    with open(umu_config, "wb") as toml_file:
-        tomli_w.dump(toml_conf, toml_file)
+    if repair_paths(umu_config, toml_conf):
+        write(umu_config, toml_conf)
@@ -0,0 +1,195 @@
+import json
+import os
+import stat
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+import umu_commander.configuration as config
+from umu_commander.files import atomic_open
+from umu_commander.proton import RACY_WINDOW, collect_proton_versions
+from umu_commander.tracking import find_deletable
+from umu_commander.util import count_users, format_size
+
+_sizes: dict[str, dict[str, Any]] | None = None
+
+
+def _sizes_path() -> Path:
+    return config.CACHE_DIR / "sizes.json"
+
+
+def _load_sizes() -> dict[str, dict[str, Any]]:
+    global _sizes
+
+    if _sizes is None:
+        try:
+            with open(_sizes_path(), "rt") as sizes_file:
+                _sizes = json.load(sizes_file)
+
+        except (FileNotFoundError, json.JSONDecodeError):
+            _sizes = {}
+
+    return _sizes
+
+
+def _dump_sizes(visited: set[str]):
+    # Only directories that still exist under the walked roots are kept.
+    config.CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    with atomic_open(_sizes_path(), "wt") as sizes_file:
+        json.dump({directory: _sizes[directory] for directory in visited}, sizes_file)
+
+
+def _scan_dir(directory: Path, mtime: int) -> dict[str, Any]:
+    # Files with several links are kept by inode so they are only counted once.
+    entry: dict[str, Any] = {"mtime": None, "size": 0, "links": [], "dirs": []}
+    with os.scandir(directory) as dir_entries:
+        for dir_entry in dir_entries:
+            # Entries removed since the listing take no space.
+            try:
+                if dir_entry.is_dir(follow_symlinks=False):
+                    entry["dirs"].append(dir_entry.name)
+                    continue
+
+                file_stat = dir_entry.stat(follow_symlinks=False)
+
+            except FileNotFoundError:
+                continue
+
+            if file_stat.st_nlink > 1 and stat.S_ISREG(file_stat.st_mode):
+                entry["links"].append(
+                    [file_stat.st_dev, file_stat.st_ino, file_stat.st_size]
+                )
+            else:
+                entry["size"] += file_stat.st_size
+
+    if time.time_ns() - mtime > RACY_WINDOW:
+        entry["mtime"] = mtime
+
+    return entry
+
+
+def _tree_usage(
+    root: Path,
+) -> tuple[int, dict[tuple[int, int], int], set[str], bool, bool]:
+    """Returns the size of files with a single link and the hardlinked files under
+    root, along with the directories walked, whether any had to be listed and
+    whether every directory could be read.
+
+    Directory listings are cached by mtime, so only directories whose entries
+    changed are listed again. Files rewritten in place keep their cached size
+    until an entry in their directory changes.
+    """
+    sizes = _load_sizes()
+
+    size: int = 0
+    links: dict[tuple[int, int], int] = {}
+    visited: set[str] = set()
+    rescanned: bool = False
+    complete: bool = True
+    pending: list[Path] = [root]
+    while len(pending) > 0:
+        directory: Path = pending.pop()
+        try:
+            mtime: int = directory.stat().st_mtime_ns
+            entry = sizes.get(str(directory))
+            if entry is None or entry["mtime"] != mtime:
+                entry = _scan_dir(directory, mtime)
+                sizes[str(directory)] = entry
+                rescanned = True
+
+        except FileNotFoundError:
+            # Removed since its parent was listed.
+            continue
+
+        except OSError:
+            complete = False
+            continue
+
+        visited.add(str(directory))
+        size += entry["size"]
+        links.update({(dev, ino): link_size for dev, ino, link_size in entry["links"]})
+        pending.extend(directory / name for name in entry["dirs"])
+
+    return size, links, visited, rescanned, complete
+
+
+def tree_usage(roots: list[Path]) -> tuple[dict[Path, int], int, set[Path]]:
+    """Returns the disk usage of each root and of all roots together, and the
+    roots with directories that could not be read, whose usage is incomplete.
+
+    Roots are walked in parallel. Hardlinked files count once per root and
+    once in the total.
+    """
+    _load_sizes()
+
+    with ThreadPoolExecutor() as executor:
+        results = dict(zip(roots, executor.map(_tree_usage, roots)))
+
+    all_links: dict[tuple[int, int], int] = {}
+    all_visited: set[str] = set()
+    changed: bool = False
+    usages: dict[Path, int] = {}
+    incomplete: set[Path] = set()
+    total: int = 0
+    for root, (size, links, visited, rescanned, complete) in results.items():
+        usages[root] = size + sum(links.values())
+        if not complete:
+            incomplete.add(root)
+        total += size
+        all_links.update(links)
+        all_visited.update(visited)
+        changed = changed or rescanned
+    total += sum(all_links.values())
+
+    if changed or len(all_visited) != len(_sizes):
+        _dump_sizes(all_visited)
+
+    return usages, total, incomplete
+
+
+def usage():
+    proton_dirs: dict[Path, list[Path]] = collect_proton_versions(sort=True)
+    deletable: dict[Path, list[Path]] = find_deletable()
+    prefixes: list[Path] = []
+    if config.DEFAULT_PREFIX_DIR.is_dir():
+        prefixes = sorted(
+            prefix for prefix in config.DEFAULT_PREFIX_DIR.iterdir() if prefix.is_dir()
+        )
+
+    proton_vers: list[Path] = [
+        proton_ver for proton_vers in proton_dirs.values() for proton_ver in proton_vers
+    ]
+    usages, total, incomplete = tree_usage([*proton_vers, *prefixes])
+
+    # Usage missing directories that could not be read is marked with a +.
+    marks: dict[Path, str] = {root: "+" for root in incomplete}
+
+    for proton_dir, proton_vers in proton_dirs.items():
+        print(f"Proton versions in {proton_dir}:")
+        for proton_ver in proton_vers:
+            print(
+                f"\t{format_size(usages[proton_ver]):>10}{marks.get(proton_ver, ' ')} {proton_ver.name} {count_users(proton_dir, proton_ver)}"
+            )
+
+    if len(prefixes) > 0:
+        print(f"Prefixes in {config.DEFAULT_PREFIX_DIR}:")
+        for prefix in prefixes:
+            print(
+                f"\t{format_size(usages[prefix]):>10}{marks.get(prefix, ' ')} {prefix.name}"
+            )
+
+    deletable_vers: list[Path] = [
+        proton_ver for proton_vers in deletable.values() for proton_ver in proton_vers
+    ]
+    reclaimable: int = sum(usages.get(proton_ver, 0) for proton_ver in deletable_vers)
+    at_least: str = "at least " if incomplete.intersection(deletable_vers) else ""
+    print(f"Reclaimable with delete: {at_least}{format_size(reclaimable)}.")
+    print(f"Total: {'at least ' if incomplete else ''}{format_size(total)}.")
+    if len(incomplete) > 0:
+        print("Sizes marked with + leave out directories that could not be read.")
+
+
+def _reset():
+    global _sizes
+    _sizes = None
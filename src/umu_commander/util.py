@@ -1,34 +1,48 @@
 from collections.abc import Iterable
 from pathlib import Path
-
-from InquirerPy.base.control import Choice
-from InquirerPy.separator import Separator
+from typing import TYPE_CHECKING
 
 from umu_commander import database as db
+from umu_commander.profiling import timed
 from umu_commander.Types import Element
 
+if TYPE_CHECKING:
+    from InquirerPy.base.control import Choice
+    from InquirerPy.separator import Separator
+
 
 def count_users(proton_dir: Path, proton_ver: Path) -> str:
-    return (
-        f"({len(db.get(proton_dir, proton_ver))})"
-        if proton_ver in db.get(proton_dir)
-        else "(-)"
-    )
+    user_count: int | None = db.count_users(proton_dir, proton_ver)
+    return f"({user_count})" if user_count is not None else "(-)"
+
+
+def format_size(size: int) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size} {unit}"
 
+        size /= 1024
 
+    return f"{size:.1f} TiB"
+
+
+@timed("util.build_choices")
 def build_choices(
     elements: Iterable[Path | Element] | None,
     groups: dict[Path | Element, Iterable[Path | Element]] | None,
     *,
     count_elements: bool = False,
-) -> list[Separator | Choice | str]:
+) -> list["Separator | Choice | str"]:
+    from InquirerPy.base.control import Choice
+    from InquirerPy.separator import Separator
+
     if elements is None:
         elements = []
 
     if groups is None:
         groups = {}
 
-    choices: list[Choice | Separator] = [Choice(el, name=el.name) for el in elements]
+    choices: list["Choice | Separator"] = [Choice(el, name=el.name) for el in elements]
     if len(choices) > 0:
         choices.append(Separator(""))
 
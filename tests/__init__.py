@@ -1,6 +1,7 @@
 import os
 import shutil
 import sys
+import unittest
 from pathlib import Path
 
 TESTING_DIR: Path = Path(os.curdir + "testing").absolute()
@@ -14,6 +15,19 @@ PROTON_SMALL: Path = PROTON_DIR_1 / "UMU_Proton_1"
 sys.path.insert(1, os.path.join(os.path.abspath(os.curdir), "src"))
 
 
+def fake_umu_run(test: unittest.TestCase, script: str):
+    """Puts a umu-run running the shell script first on PATH for the test."""
+    bin_dir = TESTING_DIR / "bin"
+    bin_dir.mkdir(exist_ok=True)
+    with open(bin_dir / "umu-run", "wt") as file:
+        file.write(f"#!/bin/sh\n{script}\n")
+    os.chmod(bin_dir / "umu-run", 0o755)
+
+    path = os.environ["PATH"]
+    os.environ["PATH"] = f"{bin_dir}:{path}"
+    test.addCleanup(os.environ.__setitem__, "PATH", path)
+
+
 def teardown():
     shutil.rmtree(TESTING_DIR)
 
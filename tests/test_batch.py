@@ -0,0 +1,70 @@
+import io
+import json
+import unittest
+from contextlib import redirect_stdout
+
+import umu_commander.configuration as config
+import umu_commander.database as db
+from tests import *
+from umu_commander import batch
+from umu_commander.configuration import DEFAULT_UMU_CONFIG_NAME
+
+
+class Batch(unittest.TestCase):
+    def setUp(self):
+        config.DB_DIR = TESTING_DIR
+        # Deleting a version also removes its template.
+        config.PREFIX_TEMPLATE_DIR = TESTING_DIR / "templates"
+        setup()
+        db._reset()
+
+    def tearDown(self):
+        teardown()
+
+    def _batch(self, operations: list[str]) -> tuple[int, list[dict]]:
+        manifest = TESTING_DIR / "manifest.jsonl"
+        with open(manifest, "wt") as file:
+            file.write("\n".join(operations))
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            failures = batch.batch(manifest)
+
+        return failures, [json.loads(line) for line in output.getvalue().splitlines()]
+
+    def test_batch(self):
+        config_path = USER_DIR / DEFAULT_UMU_CONFIG_NAME
+        failures, results = self._batch(
+            [
+                json.dumps(
+                    {
+                        "op": "create",
+                        "directory": str(USER_DIR),
+                        "exe": "game.exe",
+                        "proton": str(PROTON_BIG),
+                    }
+                ),
+                json.dumps(
+                    {
+                        "op": "track",
+                        "config": str(config_path),
+                        "proton": str(PROTON_SMALL),
+                    }
+                ),
+                "{",
+                json.dumps({"op": "delete"}),
+            ]
+        )
+
+        self.assertEqual(failures, 2)
+        self.assertEqual(
+            [result["ok"] for result in results], [True, True, False, False]
+        )
+        self.assertTrue(config_path.exists())
+        self.assertEqual(db.find_user(config_path), [PROTON_SMALL])
+
+        failures, results = self._batch(
+            [json.dumps({"op": "untrack", "config": str(config_path)})]
+        )
+        self.assertEqual(failures, 0)
+        self.assertEqual(db.find_user(config_path), [])
@@ -1,8 +1,9 @@
+import stat
 import unittest
 
 import umu_commander.configuration as config
 from tests import *
-from umu_commander import configuration
+from umu_commander import configuration, files
 
 
 class Config(unittest.TestCase):
@@ -18,3 +19,25 @@ class Config(unittest.TestCase):
         config.dump()
         self.assertTrue((TESTING_DIR / configuration.CONFIG_NAME).exists())
         config.load()
+        self.assertIsInstance(config.UNLINKED_SWEEP_INTERVAL, int)
+
+    def test_atomic_dump(self):
+        config.dump()
+        config.dump()
+        self.assertEqual(
+            [path.name for path in TESTING_DIR.iterdir() if path.is_file()],
+            [str(configuration.CONFIG_NAME)],
+        )
+
+    def test_dump_mode(self):
+        config_path = TESTING_DIR / configuration.CONFIG_NAME
+        umask = os.umask(0o027)
+        self.addCleanup(os.umask, umask)
+        self.assertEqual(files._get_umask(), 0o027)
+
+        # New files get the umask default, existing ones keep their mode.
+        config.dump()
+        self.assertEqual(stat.S_IMODE(config_path.stat().st_mode), 0o640)
+        config_path.chmod(0o664)
+        config.dump()
+        self.assertEqual(stat.S_IMODE(config_path.stat().st_mode), 0o664)
@@ -0,0 +1,104 @@
+import socket
+import stat
+import threading
+import time
+import unittest
+from unittest import mock
+
+import umu_commander.configuration as config
+import umu_commander.database as db
+from tests import *
+from umu_commander import daemon
+from umu_commander.__main__ import execute, get_parser_results, reload
+from umu_commander.configuration import DEFAULT_UMU_CONFIG_NAME
+
+
+class Daemon(unittest.TestCase):
+    def setUp(self):
+        config.CONFIG_DIR = TESTING_DIR
+        config.DB_DIR = TESTING_DIR
+        setup()
+        db._reset()
+        daemon.POLL_INTERVAL = 0.05
+
+        patcher = mock.patch.dict(os.environ, {"XDG_RUNTIME_DIR": str(TESTING_DIR)})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        teardown()
+
+    def test_forwardable(self):
+        _, args = get_parser_results(["track", "-pr", str(PROTON_BIG), "-i", "."])
+        self.assertTrue(daemon.forwardable(args))
+
+        _, args = get_parser_results(["track", "-pr", str(PROTON_BIG), "-ni"])
+        self.assertTrue(daemon.forwardable(args))
+
+        _, args = get_parser_results(["track"])
+        self.assertFalse(daemon.forwardable(args))
+
+        _, args = get_parser_results(["run"])
+        self.assertFalse(daemon.forwardable(args))
+
+    def test_request(self):
+        self.assertIsNone(daemon.request(["usage"]))
+
+        server = threading.Thread(
+            target=daemon.serve,
+            args=(lambda argv: execute(*get_parser_results(argv)), reload),
+        )
+        server.start()
+        # The socket exists once bound, but takes connections once listening.
+        while not daemon._running(daemon.socket_path()):
+            time.sleep(0.01)
+
+        try:
+            self.assertEqual(stat.S_IMODE(daemon.socket_path().stat().st_mode), 0o600)
+
+            config_path = USER_DIR / DEFAULT_UMU_CONFIG_NAME
+            response = daemon.request(
+                ["track", "-pr", str(PROTON_BIG), "-i", DEFAULT_UMU_CONFIG_NAME.name],
+                USER_DIR,
+            )
+
+            self.assertEqual(response["code"], 0)
+            self.assertIn(str(config_path), response["stdout"])
+            self.assertIn(config_path, db.get(PROTON_DIR_1, PROTON_BIG))
+
+            # Without -i the default config is tracked instead of prompting.
+            db.remove_user(PROTON_DIR_1, PROTON_BIG, config_path)
+            response = daemon.request(
+                ["track", "-pr", str(PROTON_BIG), "-ni"], USER_DIR
+            )
+
+            self.assertEqual(response["code"], 0, response["stderr"])
+            self.assertIn(str(config_path), response["stdout"])
+
+        finally:
+            daemon._stop.set()
+            server.join()
+
+        self.assertTrue(db._snapshot_path().exists())
+        self.assertFalse(daemon.socket_path().exists())
+
+    def test_unresponsive(self):
+        # A socket nobody answers on, like a daemon busy with another request.
+        daemon.socket_path().parent.mkdir(parents=True, exist_ok=True)
+        with (
+            socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server,
+            mock.patch.object(daemon, "ACCEPT_TIMEOUT", 0.1),
+        ):
+            server.bind(str(daemon.socket_path()))
+            server.listen()
+
+            start = time.monotonic()
+            self.assertIsNone(daemon.request(["usage"]))
+            self.assertLess(time.monotonic() - start, 1)
+
+        # A runtime directory that is not a directory.
+        (TESTING_DIR / "not_a_directory").touch()
+        with mock.patch.dict(
+            os.environ, {"XDG_RUNTIME_DIR": str(TESTING_DIR / "not_a_directory")}
+        ):
+            self.assertIsNone(daemon.request(["usage"]))
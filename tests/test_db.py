@@ -1,10 +1,36 @@
+import io
+import json
+import multiprocessing
 import unittest
+from contextlib import redirect_stdout
 from json import JSONDecodeError
 
 import umu_commander.configuration as config
 import umu_commander.database as db
 from tests import *
 
+STRESS_PROCESSES: int = 8
+STRESS_OPERATIONS: int = 60
+
+
+def _track_concurrently(worker: int, db_dir: Path):
+    config.DB_DIR = db_dir
+    # Small enough that workers also compact while others append.
+    db.JOURNAL_COMPACT_THRESHOLD = 16
+    db._reset()
+    try:
+        db.load()
+    except FileNotFoundError:
+        pass
+
+    for i in range(STRESS_OPERATIONS):
+        user = USER_DIR / f"{worker}_{i}"
+        db.add_user(PROTON_DIR_1, PROTON_BIG, user)
+        if i % 3 == 0:
+            db.dump()
+            db.remove_user(PROTON_DIR_1, PROTON_BIG, user)
+        db.dump()
+
 
 class Database(unittest.TestCase):
     def setUp(self):
@@ -31,15 +57,153 @@ class Database(unittest.TestCase):
             db.load()
 
     def test_addition_removal(self):
-        db.get(PROTON_DIR_1, PROTON_BIG).append(USER_DIR)
+        db.add_user(PROTON_DIR_1, PROTON_BIG, USER_DIR)
 
         self.assertIn(PROTON_BIG, db.get(PROTON_DIR_1))
         self.assertIn(USER_DIR, db.get(PROTON_DIR_1, PROTON_BIG))
 
-        db.get(PROTON_DIR_1, PROTON_BIG).remove(USER_DIR)
+        db.remove_user(PROTON_DIR_1, PROTON_BIG, USER_DIR)
 
         self.assertIn(PROTON_BIG, db.get(PROTON_DIR_1))
         self.assertNotIn(USER_DIR, db.get(PROTON_DIR_1, PROTON_BIG))
 
-        del db.get(PROTON_DIR_1)[PROTON_BIG]
+        db.remove_version(PROTON_DIR_1, PROTON_BIG)
+        self.assertNotIn(PROTON_BIG, db.get(PROTON_DIR_1))
+
+    def test_reverse_index(self):
+        db.add_user(PROTON_DIR_1, PROTON_BIG, USER_DIR)
+        db.add_user(PROTON_DIR_1, PROTON_SMALL, USER_DIR)
+
+        self.assertEqual(db.find_user(USER_DIR), [PROTON_SMALL])
+        self.assertNotIn(USER_DIR, db.get(PROTON_DIR_1, PROTON_BIG))
+
+        db.remove_version(PROTON_DIR_1, PROTON_SMALL)
+        self.assertEqual(db.find_user(USER_DIR), [])
+
+    def test_clean_dump(self):
+        db.dump()
+        self.assertFalse(db._snapshot_path().exists())
+
+        db.add_user(PROTON_DIR_1, PROTON_BIG, USER_DIR)
+        self.assertTrue(db.dirty())
+        db.dump()
+        self.assertFalse(db.dirty())
+        self.assertTrue(db._snapshot_path().exists())
+
+    def test_journal_replay(self):
+        db.compact()
+        db.add_user(PROTON_DIR_1, PROTON_BIG, USER_DIR)
+        db.add_user(PROTON_DIR_1, PROTON_SMALL, USER_DIR / "other")
+        db.remove_version(PROTON_DIR_1, PROTON_SMALL)
+        db.dump()
+
+        self.assertTrue(db._journal_path().exists())
+
+        db._reset()
+        db.load()
+        self.assertIn(USER_DIR, db.get(PROTON_DIR_1, PROTON_BIG))
+        self.assertNotIn(PROTON_SMALL, db.get(PROTON_DIR_1))
+
+    def test_journal_compaction(self):
+        db.compact()
+        for i in range(db.JOURNAL_COMPACT_THRESHOLD + 1):
+            db.add_user(PROTON_DIR_1, PROTON_BIG, USER_DIR / str(i))
+        db.dump()
+
+        self.assertFalse(db._journal_path().exists())
+
+        db._reset()
+        db.load()
+        self.assertEqual(
+            len(db.get(PROTON_DIR_1, PROTON_BIG)), db.JOURNAL_COMPACT_THRESHOLD + 1
+        )
+
+    def test_concurrent_dumps(self):
+        context = multiprocessing.get_context("fork")
+        workers = [
+            context.Process(target=_track_concurrently, args=(worker, TESTING_DIR))
+            for worker in range(STRESS_PROCESSES)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+            self.assertEqual(worker.exitcode, 0)
+
+        db._reset()
+        db.load()
+        self.assertEqual(
+            set(db.get(PROTON_DIR_1, PROTON_BIG)),
+            {
+                USER_DIR / f"{worker}_{i}"
+                for worker in range(STRESS_PROCESSES)
+                for i in range(STRESS_OPERATIONS)
+                if i % 3 != 0
+            },
+        )
+
+
+class SQLiteDatabase(unittest.TestCase):
+    def setUp(self):
+        config.DB_DIR = TESTING_DIR
+        setup()
+        db._reset()
+
+    def tearDown(self):
+        db._reset()
+        config.DB_NAME = Path("tracking.json")
+        teardown()
+
+    def test_import_json(self):
+        db.add_user(PROTON_DIR_1, PROTON_BIG, USER_DIR)
+        db.add_user(PROTON_DIR_1, PROTON_SMALL, USER_DIR / "other")
+        db.dump()
+        db._reset()
+
+        config.DB_NAME = Path("tracking.db")
+        db.load()
+
+        self.assertEqual([*db.get(PROTON_DIR_1, PROTON_BIG)], [USER_DIR])
+        self.assertEqual(db.find_user(USER_DIR / "other"), [PROTON_SMALL])
+
+    def test_addition_removal(self):
+        config.DB_NAME = Path("tracking.db")
+        db.load()
+
+        self.assertIsNone(db.count_users(PROTON_DIR_1, PROTON_BIG))
+
+        db.add_user(PROTON_DIR_1, PROTON_BIG, USER_DIR)
+        self.assertEqual(db.count_users(PROTON_DIR_1, PROTON_BIG), 1)
+
+        db.remove_user(PROTON_DIR_1, PROTON_BIG, USER_DIR)
+        self.assertEqual(db.count_users(PROTON_DIR_1, PROTON_BIG), 0)
+
+        db.remove_version(PROTON_DIR_1, PROTON_BIG)
         self.assertNotIn(PROTON_BIG, db.get(PROTON_DIR_1))
+
+    def test_corrupt_db(self):
+        from umu_commander.__main__ import init
+
+        config_dir = config.CONFIG_DIR
+        self.addCleanup(setattr, config, "CONFIG_DIR", config_dir)
+        config.CONFIG_DIR = TESTING_DIR
+        config.DB_NAME = Path("tracking.db")
+        (TESTING_DIR / "tracking.db").write_bytes(b"not a database" * 512)
+        # Left over from before the migration, it is not imported again.
+        (TESTING_DIR / "tracking.json").write_text(
+            json.dumps({str(PROTON_DIR_1): {PROTON_BIG.name: [str(USER_DIR / "old")]}})
+        )
+
+        with redirect_stdout(io.StringIO()):
+            init()
+
+        # The corrupt file is set aside and a fresh DB is used in its place.
+        self.assertEqual(
+            (TESTING_DIR / "tracking.db.old").read_bytes(), b"not a database" * 512
+        )
+        self.assertEqual(db.get(), {})
+        db.add_user(PROTON_DIR_1, PROTON_BIG, USER_DIR)
+        db.dump()
+        db._reset()
+        db.load()
+        self.assertEqual([*db.get(PROTON_DIR_1, PROTON_BIG)], [USER_DIR])
@@ -0,0 +1,110 @@
+import errno
+import unittest
+from contextlib import contextmanager
+from unittest import mock
+
+import umu_commander.configuration as config
+from tests import *
+from umu_commander import dedupe, files, proton
+
+
+class Dedupe(unittest.TestCase):
+    def setUp(self):
+        config.CACHE_DIR = TESTING_DIR / "cache"
+        config.PROTON_PATHS = (PROTON_DIR_1,)
+        config.DEFAULT_PREFIX_DIR = TESTING_DIR / "prefixes"
+        setup()
+        dedupe._reset()
+        proton._reset()
+
+        self.prefix = config.DEFAULT_PREFIX_DIR / "game"
+        self.prefix.mkdir(parents=True)
+        self.data = os.urandom(dedupe.MIN_SIZE * 2)
+        for path in (
+            PROTON_BIG / "lib.dll",
+            PROTON_SMALL / "lib.dll",
+            self.prefix / "lib.dll",
+        ):
+            path.write_bytes(self.data)
+            # Old enough for the hash cache to keep.
+            os.utime(path, ns=(0, 0))
+        # Same size, so it is hashed but never deduplicated.
+        (PROTON_SMALL / "other.dll").write_bytes(os.urandom(dedupe.MIN_SIZE * 2))
+        os.utime(PROTON_SMALL / "other.dll", ns=(0, 0))
+
+    def tearDown(self):
+        teardown()
+
+    def test_dry_run(self):
+        # Prefix files only count where they can be reflinked.
+        with mock.patch.object(dedupe, "reflink", return_value=True):
+            reclaimable = dedupe.dedupe(dry_run=True, quiet=True)
+        self.assertEqual(reclaimable, len(self.data) * 2)
+
+        with mock.patch.object(dedupe, "reflink", return_value=False):
+            reclaimable = dedupe.dedupe(dry_run=True, quiet=True)
+        self.assertEqual(reclaimable, len(self.data))
+
+        dedupe._reset()
+        _, hashed = dedupe.find_duplicates({PROTON_BIG: True, PROTON_SMALL: True})
+        self.assertEqual(hashed, 0, "Cached hashes were not reused.")
+
+    def test_dedupe(self):
+        dedupe.dedupe(quiet=True)
+
+        self.assertTrue((PROTON_BIG / "lib.dll").samefile(PROTON_SMALL / "lib.dll"))
+        for path in (
+            PROTON_BIG / "lib.dll",
+            PROTON_SMALL / "lib.dll",
+            self.prefix / "lib.dll",
+        ):
+            self.assertEqual(path.read_bytes(), self.data)
+
+        # Prefix files may only share extents, never an inode.
+        self.assertFalse((self.prefix / "lib.dll").samefile(PROTON_BIG / "lib.dll"))
+
+    def test_unreplaceable(self):
+        with (
+            mock.patch.object(dedupe, "reflink", return_value=False),
+            mock.patch("os.link", side_effect=OSError(errno.EMLINK, "Too many links")),
+        ):
+            freed = dedupe.dedupe(quiet=True)
+
+        self.assertEqual(freed, 0)
+        self.assertFalse((PROTON_BIG / "lib.dll").samefile(PROTON_SMALL / "lib.dll"))
+        self.assertEqual(
+            sorted(path.name for path in PROTON_SMALL.iterdir()),
+            ["lib.dll", "other.dll"],
+        )
+
+    def test_vanished_file(self):
+        class Vanished:
+            path = str(PROTON_BIG / "gone.dll")
+
+            def is_dir(self, follow_symlinks):
+                return False
+
+            def stat(self, follow_symlinks):
+                raise FileNotFoundError(errno.ENOENT, "No such file", self.path)
+
+        scandir = os.scandir
+
+        @contextmanager
+        def scandir_with_vanished(path):
+            with scandir(path) as entries:
+                yield [Vanished(), *entries]
+
+        # The rest of the directory is still walked.
+        with mock.patch("os.scandir", scandir_with_vanished):
+            paths = [file.path for file in dedupe._walk(PROTON_BIG, True)]
+        self.assertEqual(paths, [str(PROTON_BIG / "lib.dll")])
+
+    def test_reflink_error(self):
+        target = PROTON_BIG / "clone.dll"
+        with (
+            mock.patch("fcntl.ioctl", side_effect=OSError(errno.EIO, "I/O error")),
+            self.assertRaises(OSError),
+        ):
+            files.reflink(PROTON_BIG / "lib.dll", target)
+
+        self.assertFalse(target.exists())
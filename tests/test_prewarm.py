@@ -0,0 +1,139 @@
+import subprocess
+import threading
+import time
+import unittest
+from unittest import mock
+
+import tomli_w
+
+import umu_commander.configuration as config
+from tests import *
+from umu_commander import prewarm, umu_config
+from umu_commander.configuration import DEFAULT_UMU_CONFIG_NAME
+
+
+class Prewarm(unittest.TestCase):
+    def setUp(self):
+        config.CACHE_DIR = TESTING_DIR / "cache"
+        setup()
+        for name in ("proton", "files/lib/wine/ntdll.so", "files/lib/wine/d3d11.dll"):
+            (PROTON_BIG / name).parent.mkdir(parents=True, exist_ok=True)
+            (PROTON_BIG / name).write_bytes(b"\0" * 4096)
+            # Unused for longer than relatime hides.
+            os.utime(PROTON_BIG / name, (0, 0))
+
+    def tearDown(self):
+        teardown()
+
+    def _write_config(self) -> Path:
+        config_path = USER_DIR / DEFAULT_UMU_CONFIG_NAME
+        with open(config_path, "wb") as toml_file:
+            tomli_w.dump(
+                {
+                    "umu": {
+                        "prefix": str(USER_DIR / "prefix"),
+                        "proton": str(PROTON_BIG),
+                        "exe": str(USER_DIR / "game.exe"),
+                    }
+                },
+                toml_file,
+            )
+
+        return config_path
+
+    def test_unlearned(self):
+        self.assertEqual(
+            sorted(prewarm.files_to_prewarm(PROTON_BIG)),
+            [
+                str(PROTON_BIG / "files/lib/wine/d3d11.dll"),
+                str(PROTON_BIG / "files/lib/wine/ntdll.so"),
+            ],
+        )
+
+        system32 = USER_DIR / "prefix/drive_c/windows/system32"
+        system32.mkdir(parents=True)
+        (system32 / "kernel32.dll").touch()
+        self.assertIn(
+            str(system32 / "kernel32.dll"),
+            prewarm.files_to_prewarm(PROTON_BIG, USER_DIR / "prefix"),
+        )
+
+    def test_prewarm(self):
+        with mock.patch.object(prewarm, "_advise") as advise:
+            prewarm._prewarm(PROTON_BIG, None, threading.Event())
+        self.assertEqual(
+            sorted(call.args[0] for call in advise.call_args_list),
+            sorted(prewarm.files_to_prewarm(PROTON_BIG)),
+        )
+
+        stop = threading.Event()
+        stop.set()
+        with mock.patch.object(prewarm, "_advise") as advise:
+            prewarm._prewarm(PROTON_BIG, None, stop)
+        advise.assert_not_called()
+
+    def test_failed_launch(self):
+        config_path = self._write_config()
+        stop = threading.Event()
+        with (
+            mock.patch.object(prewarm, "start", return_value=stop),
+            mock.patch.object(prewarm, "learn") as learn,
+            mock.patch("subprocess.run", side_effect=FileNotFoundError("umu-run")),
+            self.assertRaises(FileNotFoundError),
+        ):
+            umu_config.run(config_path, "proton")
+
+        self.assertTrue(stop.is_set())
+        learn.assert_not_called()
+
+    def test_exit_not_delayed(self):
+        # 80 slow files over 8 workers would hold the interpreter for 2s if it
+        # waited for them.
+        script = (
+            "import time\n"
+            "from pathlib import Path\n"
+            "from umu_commander import prewarm\n"
+            "prewarm._advise = lambda path: time.sleep(0.2)\n"
+            "prewarm.files_to_prewarm = lambda *args: ['file'] * 80\n"
+            "prewarm.start(Path('/'))\n"
+            "time.sleep(0.05)\n"
+        )
+        env = {
+            **os.environ,
+            "PYTHONPATH": str(Path(__file__).parent.parent / "src"),
+        }
+        start = time.monotonic()
+        subprocess.run([sys.executable, "-c", script], env=env, check=True)
+        self.assertLess(time.monotonic() - start, 1.5)
+
+    def test_learn(self):
+        config_path = self._write_config()
+
+        # Stands in for a launch reading the proton script and ntdll.
+        fake_umu_run(
+            self,
+            f'touch -a "{PROTON_BIG / "proton"}" "{PROTON_BIG / "files/lib/wine/ntdll.so"}"',
+        )
+        umu_config.run(config_path, "proton")
+        manifest = prewarm._load_manifest(PROTON_BIG)
+        self.assertEqual(manifest, {"proton": 1.0, "files/lib/wine/ntdll.so": 1.0})
+        self.assertEqual(
+            prewarm.files_to_prewarm(PROTON_BIG),
+            [str(PROTON_BIG / "proton"), str(PROTON_BIG / "files/lib/wine/ntdll.so")],
+        )
+
+        # Files read within a day before the launch keep their score, files
+        # unused for longer decay until they are dropped.
+        an_hour_ago = time.time() - 3600
+        os.utime(PROTON_BIG / "proton", (an_hour_ago, 0))
+        os.utime(PROTON_BIG / "files/lib/wine/ntdll.so", (0, 0))
+        for _ in range(4):
+            prewarm.learn(PROTON_BIG, time.time_ns())
+        self.assertEqual(prewarm._load_manifest(PROTON_BIG), {"proton": 1.0})
+
+        # An unwritable cache leaves the manifest alone instead of raising.
+        config.CACHE_DIR = TESTING_DIR / "not_a_directory"
+        config.CACHE_DIR.touch()
+        os.utime(PROTON_BIG / "proton", (0, 0))
+        prewarm.learn(PROTON_BIG, time.time_ns())
+        self.assertEqual(prewarm._load_manifest(PROTON_BIG), {})
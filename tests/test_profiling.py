@@ -0,0 +1,39 @@
+import json
+import unittest
+
+from tests import *
+from umu_commander import profiling
+
+
+class Profiling(unittest.TestCase):
+    def setUp(self):
+        setup()
+
+    def tearDown(self):
+        teardown()
+
+    def test_report(self):
+        @profiling.timed("test.function")
+        def function() -> int:
+            return sum(range(1000))
+
+        # Nothing is recorded before profiling starts.
+        function()
+        self.assertEqual(profiling._spans, [])
+
+        profiling.start(profiling.CAPTURES)
+        with profiling.span("test.block", detail="value"):
+            function()
+        profiling.report(TESTING_DIR / "profile.json")
+
+        self.assertFalse(profiling.enabled())
+        with open(TESTING_DIR / "profile.json", "rt") as profile_file:
+            report = json.load(profile_file)
+
+        self.assertEqual(
+            [span["name"] for span in report["spans"]],
+            ["test.block", "test.function"],
+        )
+        self.assertEqual(report["spans"][0]["detail"], "value")
+        self.assertGreater(len(report["cprofile"]), 0)
+        self.assertGreater(report["tracemalloc"]["peak"], 0)
@@ -1,4 +1,8 @@
+import io
+import json
+import time
 import unittest
+from contextlib import redirect_stdout
 
 import umu_commander.configuration as config
 from tests import *
@@ -9,7 +13,9 @@ class Tracking(unittest.TestCase):
     def setUp(self):
         config.PROTON_PATHS = [PROTON_DIR_1, PROTON_DIR_2]
         config.UMU_PROTON_PATH = PROTON_DIR_1
+        config.CACHE_DIR = TESTING_DIR / "cache"
         setup()
+        proton._reset()
 
     def tearDown(self):
         teardown()
@@ -26,3 +32,58 @@ class Tracking(unittest.TestCase):
     def test_get_latest_umu_proton(self):
         latest: Path = proton.get_latest_umu_proton()
         self.assertEqual(latest, PROTON_BIG, "Deduced latest proton incorrectly.")
+
+    def test_inventory_cache(self):
+        os.utime(PROTON_DIR_1, ns=(0, 0))
+        proton.collect_proton_versions()
+
+        # A cache hit must not rescan the directory.
+        proton._reset()
+        with open(proton._inventory_path(), "rt") as file:
+            inventory = json.load(file)
+        inventory[str(PROTON_DIR_1)]["versions"] = ["Cached"]
+        with open(proton._inventory_path(), "wt") as file:
+            json.dump(inventory, file)
+
+        versions = proton.collect_proton_versions()
+        self.assertEqual(versions[PROTON_DIR_1], [PROTON_DIR_1 / "Cached"])
+
+        (PROTON_DIR_1 / "UMU_Proton_2").mkdir()
+        os.utime(PROTON_DIR_1, ns=(1, 1))
+        versions = proton.collect_proton_versions()
+        self.assertEqual(len(versions[PROTON_DIR_1]), 3)
+
+    def test_missing_proton_path(self):
+        config.PROTON_PATHS = [TESTING_DIR / "missing", PROTON_DIR_1, PROTON_DIR_2]
+        versions = proton.collect_proton_versions()
+        self.assertEqual([*versions.keys()], [PROTON_DIR_1])
+        self.assertEqual(
+            [*proton.iter_proton_versions()], [(PROTON_DIR_1, versions[PROTON_DIR_1])]
+        )
+
+    def test_background_update(self):
+        fake_umu_run(self, f'echo $$ > "{TESTING_DIR / "pid"}"\nexec sleep 30')
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            proton.start_update()
+            proton.wait_for_update(timeout=0.1)
+
+        self.assertIn("still updating", output.getvalue())
+        self.assertIsNone(proton._update)
+        # umu-run is not left running once the wait gives up on it.
+        with self.assertRaises(ProcessLookupError):
+            os.kill(int((TESTING_DIR / "pid").read_text()), 0)
+
+    def test_fetch_latest_umu_proton(self):
+        fake_umu_run(
+            self,
+            "echo 'DEBUG: Checking for updates' >&2\n"
+            f"echo \"DEBUG: PROTONPATH='{PROTON_BIG}'\" >&2\n"
+            "sleep 30",
+        )
+
+        start = time.monotonic()
+        latest = proton.fetch_latest_umu_proton()
+        self.assertLess(time.monotonic() - start, 10, "umu-run was not stopped.")
+        self.assertEqual(latest, (PROTON_BIG.name, PROTON_BIG))
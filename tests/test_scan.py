@@ -0,0 +1,74 @@
+import io
+import tomllib
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+
+import tomli_w
+
+import umu_commander.configuration as config
+import umu_commander.database as db
+from tests import *
+from umu_commander import scan
+from umu_commander.__main__ import get_parser_results
+from umu_commander.configuration import DEFAULT_UMU_CONFIG_NAME
+
+
+class Scan(unittest.TestCase):
+    def setUp(self):
+        config.DB_DIR = TESTING_DIR
+        setup()
+        db._reset()
+
+    def tearDown(self):
+        teardown()
+
+    def _write(self, path: Path, proton: Path, prefix: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as toml_file:
+            tomli_w.dump(
+                {
+                    "umu": {
+                        "prefix": str(prefix),
+                        "proton": str(proton),
+                        "exe": str(path.parent / "game.exe"),
+                    }
+                },
+                toml_file,
+            )
+
+    def test_scan(self):
+        game_1 = USER_DIR / "game_1" / DEFAULT_UMU_CONFIG_NAME
+        game_2 = USER_DIR / "nested" / "game_2" / DEFAULT_UMU_CONFIG_NAME
+        other = USER_DIR / "game_3" / "other.toml"
+        self._write(game_1, PROTON_BIG, game_1.parent / "prefix")
+        # Moved from elsewhere, so its prefix should be repaired.
+        self._write(game_2, PROTON_SMALL, TESTING_DIR / "moved" / "prefix")
+        self._write(other, PROTON_SMALL, other.parent / "prefix")
+        (USER_DIR / "broken").mkdir()
+        (USER_DIR / "broken" / DEFAULT_UMU_CONFIG_NAME).write_text("[umu")
+
+        with redirect_stdout(io.StringIO()):
+            scan.scan([USER_DIR])
+
+        self.assertIn(game_1, db.get(PROTON_DIR_1, PROTON_BIG))
+        self.assertIn(game_2, db.get(PROTON_DIR_1, PROTON_SMALL))
+        self.assertNotIn(other, db.get(PROTON_DIR_1, PROTON_SMALL))
+
+        with open(game_2, "rb") as toml_file:
+            self.assertEqual(
+                tomllib.load(toml_file)["umu"]["prefix"], str(game_2.parent / "prefix")
+            )
+
+        with redirect_stdout(io.StringIO()):
+            scan.scan([USER_DIR], any_toml=True)
+
+        self.assertIn(other, db.get(PROTON_DIR_1, PROTON_SMALL))
+
+    def test_targets(self):
+        _, args = get_parser_results(["scan", "a", "b", "-q"])
+        self.assertEqual(args.targets, [Path("a"), Path("b")])
+        self.assertTrue(args.quiet)
+
+        for argv in (["usage", "a"], ["scan", "-j", "2"]):
+            with redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+                get_parser_results(argv)
@@ -0,0 +1,67 @@
+import subprocess
+import unittest
+
+from tests import *
+
+# Modules that must not be imported on the way to launching a game.
+HEAVY_MODULES: tuple[str, ...] = (
+    "InquirerPy",
+    "prompt_toolkit",
+    "tomli_w",
+    "sqlite3",
+    "multiprocessing",
+)
+# Modules of other verbs, a single launch must not import them either.
+VERB_MODULES: tuple[str, ...] = (
+    "umu_commander.batch",
+    "umu_commander.daemon",
+    "umu_commander.dedupe",
+    "umu_commander.scan",
+    "umu_commander.supervise",
+    "umu_commander.usage",
+)
+
+
+class Startup(unittest.TestCase):
+    def setUp(self):
+        setup()
+
+    def tearDown(self):
+        teardown()
+
+    def test_run_import_time(self):
+        env = {
+            **os.environ,
+            "HOME": str(TESTING_DIR),
+            "PYTHONPATH": str(Path(__file__).parent.parent / "src"),
+        }
+        args = [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            "from umu_commander.__main__ import main; exit(main())",
+            "run",
+            "-i",
+            str(USER_DIR / "missing.toml"),
+        ]
+        # The first invocation writes the default config.
+        subprocess.run(args, env=env, capture_output=True)
+        process = subprocess.run(args, env=env, capture_output=True, text=True)
+        self.assertEqual(process.returncode, 0, process.stderr)
+
+        imports: dict[str, int] = {}
+        for line in process.stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+
+            _, cumulative, module = line.split("|")
+            if cumulative.strip().isdigit():
+                imports[module.strip()] = int(cumulative)
+
+        # Which modules are imported, rather than how long that takes, so the
+        # check does not depend on how fast or busy the machine is.
+        self.assertIn("umu_commander.__main__", imports)
+        for module in imports:
+            self.assertNotIn(module.split(".")[0], HEAVY_MODULES)
+            self.assertNotIn(module, VERB_MODULES)
@@ -0,0 +1,141 @@
+import asyncio
+import io
+import signal
+import subprocess
+import time
+import unittest
+from contextlib import redirect_stdout
+
+import tomli_w
+
+import umu_commander.configuration as config
+from tests import *
+from umu_commander import supervise
+from umu_commander.configuration import DEFAULT_UMU_CONFIG_NAME
+
+# Writes the launch's pid to a file named after its directory, renamed into place
+# so it is never read half written.
+PID_SCRIPT: str = (
+    f'pid_file="{TESTING_DIR}/$(basename $(dirname $2))"\n'
+    'echo $$ > "$pid_file.tmp"\n'
+    'mv "$pid_file.tmp" "$pid_file"\n'
+    "exec sleep 30"
+)
+
+
+class Supervise(unittest.TestCase):
+    def setUp(self):
+        config.CACHE_DIR = TESTING_DIR / "cache"
+        setup()
+        self.configs = []
+        for name in ("game_a", "game_b", "game_c"):
+            (USER_DIR / name).mkdir()
+            config_path = USER_DIR / name / DEFAULT_UMU_CONFIG_NAME
+            with open(config_path, "wb") as toml_file:
+                tomli_w.dump(
+                    {
+                        "umu": {
+                            "prefix": str(USER_DIR / name / "prefix"),
+                            "proton": str(PROTON_BIG),
+                            "exe": str(USER_DIR / name / "game.exe"),
+                        }
+                    },
+                    toml_file,
+                )
+            (USER_DIR / name / "game.exe").touch()
+            self.configs.append(config_path)
+
+    def tearDown(self):
+        teardown()
+
+    def test_run_many(self):
+        # Fails when another launch is running, to check the jobs limit.
+        running = TESTING_DIR / "running"
+        fake_umu_run(
+            self,
+            f'mkdir "{running}" || exit 9\n'
+            'echo "started $2"\n'
+            "sleep 0.1\n"
+            f'rmdir "{running}"\n'
+            'case "$2" in *game_c*) exit 3;; esac',
+        )
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            failed = supervise.run_many([USER_DIR / "game_*"], jobs=1)
+
+        self.assertEqual(failed, 1)
+        lines = output.getvalue().splitlines()
+        self.assertIn(f"[game_a] started {self.configs[0]}", lines)
+        self.assertIn(f"[game_c] started {self.configs[2]}", lines)
+        self.assertTrue(any(line.startswith("game_c: exited with 3") for line in lines))
+        self.assertTrue((USER_DIR / "game_b" / "prefix").is_dir())
+
+    def test_broken_config(self):
+        fake_umu_run(self, 'echo "started $2"')
+        self.configs[1].write_text("[umu\n")
+        # No prefix key.
+        self.configs[2].write_text('[umu]\nexe = "game.exe"\n')
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            launches = asyncio.run(supervise.supervise(self.configs))
+
+        self.assertEqual([launch.code for launch in launches], [0, None, None])
+        lines = output.getvalue().splitlines()
+        self.assertIn(f"[game_a] started {self.configs[0]}", lines)
+        self.assertTrue(
+            any(line.startswith("[game_b] TOMLDecodeError") for line in lines)
+        )
+        self.assertIn("[game_c] KeyError: 'prefix'", lines)
+
+    def test_interrupt(self):
+        fake_umu_run(self, PID_SCRIPT)
+
+        async def interrupt():
+            task = asyncio.create_task(supervise.supervise(self.configs, jobs=2))
+            while not (TESTING_DIR / "game_b").exists():
+                await asyncio.sleep(0.01)
+
+            task.cancel()
+            return await task
+
+        with redirect_stdout(io.StringIO()):
+            launches = asyncio.run(interrupt())
+
+        self.assertEqual([launch.code for launch in launches], [None, None, None])
+        self.assertGreater(launches[0].duration, 0)
+        self.assertEqual(launches[2].duration, 0)
+        with self.assertRaises(ProcessLookupError):
+            os.kill(int((TESTING_DIR / "game_a").read_text()), 0)
+
+    def test_signals(self):
+        fake_umu_run(self, PID_SCRIPT)
+        env = {
+            **os.environ,
+            "HOME": str(TESTING_DIR),
+            "PYTHONPATH": str(Path(__file__).parent.parent / "src"),
+        }
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            with self.subTest(signal=signal_number.name):
+                for name in ("game_a", "game_b"):
+                    (TESTING_DIR / name).unlink(missing_ok=True)
+
+                process = subprocess.Popen(
+                    [sys.executable, "-m", "umu_commander", "-q", "run"]
+                    + [str(path) for path in self.configs[:2]],
+                    env=env,
+                    stdout=subprocess.DEVNULL,
+                )
+                deadline = time.monotonic() + 10
+                while not all(
+                    (TESTING_DIR / name).exists() for name in ("game_a", "game_b")
+                ):
+                    self.assertLess(time.monotonic(), deadline)
+                    time.sleep(0.01)
+
+                process.send_signal(signal_number)
+                self.assertEqual(process.wait(10), 3)
+                for name in ("game_a", "game_b"):
+                    with self.assertRaises(ProcessLookupError):
+                        os.kill(int((TESTING_DIR / name).read_text()), 0)
@@ -0,0 +1,96 @@
+import errno
+import tomllib
+import unittest
+from unittest import mock
+
+import umu_commander.configuration as config
+from tests import *
+from umu_commander import templates, umu_config
+from umu_commander.configuration import DEFAULT_UMU_CONFIG_NAME
+
+
+class Templates(unittest.TestCase):
+    def setUp(self):
+        config.PREFIX_TEMPLATE_DIR = TESTING_DIR / "templates"
+        setup()
+        (PROTON_BIG / "proton").touch()
+
+        # Counts builds and sets up a minimal prefix.
+        fake_umu_run(
+            self,
+            f'echo >> "{TESTING_DIR / "builds"}"\n'
+            'mkdir -p "$WINEPREFIX/drive_c/windows/system32" "$WINEPREFIX/dosdevices"\n'
+            'echo "$PROTONPATH" > "$WINEPREFIX/drive_c/windows/system32/kernel32.dll"\n'
+            'ln -s ../drive_c "$WINEPREFIX/dosdevices/c:"',
+        )
+
+    def tearDown(self):
+        teardown()
+
+    def _builds(self) -> int:
+        return len((TESTING_DIR / "builds").read_text().splitlines())
+
+    def test_clone(self):
+        template = templates.get(PROTON_BIG, quiet=True)
+        self.assertEqual(template, templates.template_path(PROTON_BIG))
+
+        prefix = USER_DIR / "prefix"
+        self.assertEqual(templates.clone(template, prefix), 1)
+        self.assertEqual(
+            (prefix / "drive_c/windows/system32/kernel32.dll").read_text(),
+            f"{PROTON_BIG}\n",
+        )
+        self.assertEqual(os.readlink(prefix / "dosdevices/c:"), "../drive_c")
+
+        # Writing to the clone leaves the template alone.
+        (prefix / "drive_c/windows/system32/kernel32.dll").write_text("changed")
+        self.assertEqual(
+            (template / "drive_c/windows/system32/kernel32.dll").read_text(),
+            f"{PROTON_BIG}\n",
+        )
+
+    def _create(self) -> dict:
+        output = umu_config.create(
+            USER_DIR / "prefix",
+            PROTON_BIG,
+            exe=USER_DIR / "game.exe",
+            output=USER_DIR / DEFAULT_UMU_CONFIG_NAME,
+            template=True,
+            interactive=False,
+            quiet=True,
+        )
+        self.assertEqual(output, USER_DIR / DEFAULT_UMU_CONFIG_NAME)
+        with open(output, "rb") as toml_file:
+            return tomllib.load(toml_file)
+
+    def test_create(self):
+        umu_config_params = self._create()
+        self.assertEqual(umu_config_params["umu"]["prefix"], str(USER_DIR / "prefix"))
+        self.assertEqual(
+            (USER_DIR / "prefix/drive_c/windows/system32/kernel32.dll").read_text(),
+            f"{PROTON_BIG}\n",
+        )
+
+    def test_create_clone_failure(self):
+        # A partial clone is removed, so the prefix is set up on first run.
+        with mock.patch.object(
+            templates, "clone_file", side_effect=OSError(errno.ENOSPC, "No space")
+        ):
+            umu_config_params = self._create()
+
+        self.assertEqual(umu_config_params["umu"]["prefix"], str(USER_DIR / "prefix"))
+        self.assertFalse((USER_DIR / "prefix").exists())
+
+    def test_freshness(self):
+        templates.get(PROTON_BIG, quiet=True)
+        templates.get(PROTON_BIG, quiet=True)
+        self.assertEqual(self._builds(), 1)
+
+        # An updated Proton build replaces its template.
+        (PROTON_BIG / "proton").unlink()
+        (PROTON_BIG / "proton").touch()
+        templates.get(PROTON_BIG, quiet=True)
+        self.assertEqual(self._builds(), 2)
+
+        self.assertGreater(templates.remove(PROTON_BIG), 0)
+        self.assertFalse(templates.is_fresh(PROTON_BIG))
@@ -10,7 +10,10 @@ from umu_commander.configuration import DEFAULT_UMU_CONFIG_NAME
 class Tracking(unittest.TestCase):
     def setUp(self):
         config.DB_DIR = TESTING_DIR
+        # Deleting a version also removes its template.
+        config.PREFIX_TEMPLATE_DIR = TESTING_DIR / "templates"
         setup()
+        db._reset()
 
     def tearDown(self):
         teardown()
@@ -50,3 +53,53 @@ class Tracking(unittest.TestCase):
             db.get(PROTON_DIR_1, PROTON_BIG),
             "Auto untrack did not untrack removed directory.",
         )
+
+    def test_maintenance_interval(self):
+        os.chdir(USER_DIR)
+        (USER_DIR / DEFAULT_UMU_CONFIG_NAME).touch()
+
+        tracking.track(
+            PROTON_DIR_1 / PROTON_BIG, DEFAULT_UMU_CONFIG_NAME, update_versions=False
+        )
+        tracking.maintenance()
+        self.assertTrue(tracking._maintenance_stamp().exists())
+
+        (USER_DIR / DEFAULT_UMU_CONFIG_NAME).unlink()
+        tracking.maintenance()
+        self.assertIn(
+            USER_DIR / DEFAULT_UMU_CONFIG_NAME,
+            db.get(PROTON_DIR_1, PROTON_BIG),
+            "Maintenance ran again before its interval passed.",
+        )
+
+        tracking._maintenance_stamp().unlink()
+        tracking.maintenance()
+        self.assertNotIn(
+            USER_DIR / DEFAULT_UMU_CONFIG_NAME, db.get(PROTON_DIR_1, PROTON_BIG)
+        )
+
+    def test_delete(self):
+        config.UMU_PROTON_PATH = PROTON_DIR_1
+        config.CACHE_DIR = TESTING_DIR / "cache"
+        with open(PROTON_SMALL / "proton", "wt") as file:
+            file.write("proton")
+
+        db.add_user(PROTON_DIR_1, PROTON_SMALL, USER_DIR)
+        db.remove_user(PROTON_DIR_1, PROTON_SMALL, USER_DIR)
+        db.add_user(PROTON_DIR_1, PROTON_DIR_1 / "Removed", USER_DIR)
+        db.remove_user(PROTON_DIR_1, PROTON_DIR_1 / "Removed", USER_DIR)
+        db.add_user(PROTON_DIR_1, PROTON_BIG, USER_DIR)
+        db.remove_user(PROTON_DIR_1, PROTON_BIG, USER_DIR)
+
+        # The latest UMU-Proton and missing versions cannot be deleted, only
+        # collect_deletable untracks missing ones.
+        self.assertEqual(tracking.find_deletable(), {PROTON_DIR_1: [PROTON_SMALL]})
+        self.assertIn(PROTON_DIR_1 / "Removed", db.get(PROTON_DIR_1))
+        deletable = tracking.collect_deletable()
+        self.assertEqual(deletable, {PROTON_DIR_1: [PROTON_SMALL]})
+        self.assertNotIn(PROTON_DIR_1 / "Removed", db.get(PROTON_DIR_1))
+
+        reclaimed = tracking.remove_versions(deletable[PROTON_DIR_1], quiet=True)
+        self.assertEqual(reclaimed, len("proton"))
+        self.assertFalse(PROTON_SMALL.exists())
+        self.assertNotIn(PROTON_SMALL, db.get(PROTON_DIR_1))
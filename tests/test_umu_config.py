@@ -0,0 +1,139 @@
+import io
+import json
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+
+import tomli_w
+
+import umu_commander.configuration as config
+import umu_commander.database as db
+from tests import *
+from umu_commander import proton, umu_config
+from umu_commander.__main__ import dispatch, get_parser_results
+from umu_commander.configuration import DEFAULT_UMU_CONFIG_NAME
+
+
+class UmuConfig(unittest.TestCase):
+    def setUp(self):
+        config.CACHE_DIR = TESTING_DIR / "cache"
+        setup()
+
+    def tearDown(self):
+        teardown()
+
+    def _write(self, path: Path, toml_conf: dict):
+        with open(path, "wb") as toml_file:
+            tomli_w.dump(toml_conf, toml_file)
+
+        # Older than the racy window, so the plan is reused.
+        os.utime(path, (0, 0))
+
+    def test_launch_plan_cache(self):
+        config_path = USER_DIR / DEFAULT_UMU_CONFIG_NAME
+        toml_conf = {
+            "umu": {
+                "prefix": str(USER_DIR / "prefix"),
+                "proton": str(PROTON_BIG),
+                "exe": str(USER_DIR / "game.exe"),
+                "runners": ["mangohud"],
+            },
+            "env": {"DXVK_ASYNC": 1},
+        }
+        self._write(config_path, toml_conf)
+
+        plan = umu_config.load_plan(config_path)
+        self.assertEqual(
+            plan["argv"], ["mangohud", "umu-run", "--config", str(config_path)]
+        )
+        self.assertEqual(plan["env"], {"DXVK_ASYNC": "1"})
+        self.assertEqual(umu_config.stale_paths(plan), {"exe": USER_DIR / "game.exe"})
+
+        # Cached plans are used as they are while the config is unchanged.
+        plan_path = umu_config._plan_path(config_path)
+        with open(plan_path, "wt") as plan_file:
+            json.dump({**plan, "env": {}}, plan_file)
+        self.assertEqual(umu_config.load_plan(config_path)["env"], {})
+
+        toml_conf["env"]["DXVK_ASYNC"] = 0
+        toml_conf["umu"]["runners"] = []
+        self._write(config_path, toml_conf)
+        plan = umu_config.load_plan(config_path)
+        self.assertEqual(plan["argv"], ["umu-run", "--config", str(config_path)])
+        self.assertEqual(plan["env"], {"DXVK_ASYNC": "0"})
+
+    def test_run_reads_config(self):
+        config_dir = config.CONFIG_DIR
+        self.addCleanup(setattr, config, "CONFIG_DIR", config_dir)
+        config.CONFIG_DIR = TESTING_DIR / "config"
+        config.CACHE_DIR = TESTING_DIR / "configured_cache"
+        config.dump()
+        config.CACHE_DIR = TESTING_DIR / "cache"
+
+        config_path = USER_DIR / DEFAULT_UMU_CONFIG_NAME
+        self._write(
+            config_path,
+            {
+                "umu": {
+                    "prefix": str(USER_DIR / "prefix"),
+                    "proton": str(PROTON_BIG),
+                    "exe": str(USER_DIR / "game.exe"),
+                }
+            },
+        )
+        fake_umu_run(self, "exit 0")
+        self.assertEqual(
+            dispatch(*get_parser_results(["run", "-i", str(config_path)])), 0
+        )
+
+        # The launch plan is cached where the config says.
+        self.assertEqual(config.CACHE_DIR, TESTING_DIR / "configured_cache")
+        self.assertTrue(umu_config._plan_path(config_path.absolute()).exists())
+
+    def test_run_prefix_error(self):
+        config_path = USER_DIR / DEFAULT_UMU_CONFIG_NAME
+        self._write(
+            config_path,
+            {
+                "umu": {
+                    "prefix": str(USER_DIR / "missing" / "prefix"),
+                    "proton": str(PROTON_BIG),
+                    "exe": str(USER_DIR / "game.exe"),
+                }
+            },
+        )
+        output = io.StringIO()
+        with redirect_stdout(output):
+            umu_config.run(config_path)
+
+        self.assertIn(
+            f"Could not create the prefix {USER_DIR / 'missing' / 'prefix'}",
+            output.getvalue(),
+        )
+        self.assertNotIn("does not exist", output.getvalue())
+
+    def test_jobs(self):
+        with redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            get_parser_results(["run", "-j", "0", "a.toml", "b.toml"])
+        self.assertEqual(get_parser_results(["run", "-j", "2"])[1].jobs, 2)
+
+    def test_create_with_proton(self):
+        config.DB_DIR = TESTING_DIR
+        db._reset()
+        self.addCleanup(db._reset)
+        self.addCleanup(proton._reset)
+        fake_umu_run(self, f'touch "{TESTING_DIR / "updated"}"')
+
+        # An update asked for runs even with a Proton version given.
+        for update_versions in (False, True):
+            with self.subTest(update_versions=update_versions):
+                output = umu_config.create(
+                    USER_DIR / "prefix",
+                    PROTON_BIG,
+                    exe=USER_DIR / "game.exe",
+                    output=USER_DIR / DEFAULT_UMU_CONFIG_NAME,
+                    interactive=False,
+                    update_versions=update_versions,
+                    quiet=True,
+                )
+                self.assertEqual(output, USER_DIR / DEFAULT_UMU_CONFIG_NAME)
+                self.assertEqual((TESTING_DIR / "updated").exists(), update_versions)
@@ -0,0 +1,59 @@
+import unittest
+from unittest import mock
+
+import umu_commander.configuration as config
+from tests import *
+from umu_commander import usage
+
+
+class Usage(unittest.TestCase):
+    def setUp(self):
+        config.CACHE_DIR = TESTING_DIR / "cache"
+        setup()
+        usage._reset()
+
+        with open(PROTON_BIG / "file", "wt") as file:
+            file.write("0123456789")
+        (PROTON_BIG / "lib").mkdir()
+        os.link(PROTON_BIG / "file", PROTON_BIG / "lib" / "link")
+        os.link(PROTON_BIG / "file", PROTON_SMALL / "link")
+
+    def tearDown(self):
+        teardown()
+
+    def test_hardlinks(self):
+        usages, total, _ = usage.tree_usage([PROTON_BIG, PROTON_SMALL])
+        self.assertEqual(usages, {PROTON_BIG: 10, PROTON_SMALL: 10})
+        self.assertEqual(total, 10)
+
+    def test_cached_sizes(self):
+        os.utime(PROTON_BIG / "lib", ns=(0, 0))
+        usage.tree_usage([PROTON_BIG])
+        usage._reset()
+
+        # Cached directories are not listed again, so this file goes unnoticed.
+        with open(PROTON_BIG / "lib" / "unlisted", "wt") as file:
+            file.write("0123456789")
+        os.utime(PROTON_BIG / "lib", ns=(0, 0))
+
+        usages, _, _ = usage.tree_usage([PROTON_BIG])
+        self.assertEqual(usages[PROTON_BIG], 10)
+
+        os.utime(PROTON_BIG / "lib", ns=(1, 1))
+        usages, _, _ = usage.tree_usage([PROTON_BIG])
+        self.assertEqual(usages[PROTON_BIG], 20)
+
+    def test_unreadable(self):
+        (PROTON_BIG / "lib" / "unread").write_text("01234")
+        scan_dir = usage._scan_dir
+
+        def unreadable_lib(directory, mtime):
+            if directory == PROTON_BIG / "lib":
+                raise PermissionError(13, "Permission denied", str(directory))
+            return scan_dir(directory, mtime)
+
+        # Only the unreadable directory is left out, and the root is marked.
+        with mock.patch.object(usage, "_scan_dir", unreadable_lib):
+            usages, _, incomplete = usage.tree_usage([PROTON_BIG, PROTON_SMALL])
+        self.assertEqual(usages, {PROTON_BIG: 10, PROTON_SMALL: 10})
+        self.assertEqual(incomplete, {PROTON_BIG})